@@ -0,0 +1,85 @@
+"""
+Benchmark
+
+Environment: Python 3.7.3, IDE: Spyder, CPU: 3.00GHz
+"""
+
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from instances import Instance
+import main as m
+
+'''***************************Island benchmark*********************************
+Aims:
+    compare the wall-clock time which one colony and several colonies of the
+    island model need to reach a given gap to the best known solution on the
+    Golden instances
+Inputs:
+    1.  instances (list) - instance numbers of the Golden set, set 2
+    2.  islands (list) - numbers of colonies compared in each run, 1 is the
+        single colony of main.run
+    3.  gap (float) - the gap of objective value to the best known solution,
+        eg. 0.05 means 5% above BestKnown, each run stops when reaching it 
+        by the stopping rule Gap of main.py, so the wall-clock time of the 
+        run, start-up of the colonies included, is the time reaching the gap
+    4.  Iterations (int) - the most iterations of each run
+    5.  Migration (int) - iterations between two exchanges of the colonies
+    6.  algorithm (int) - 1 original 2 semi-enhanced and 3 enhanced
+    7.  Seed (int) - seed of the benchmark, the same for all settings
+Outputs:
+    1.  print the wall-clock time, the time reaching the gap and the final
+        gap of each instance and number of colonies
+    2.  save them as a CSV file in folder Results
+****************************************************************************'''
+
+'''----------------------------------------------------------------------------
+Please set the inputs of the benchmark
+----------------------------------------------------------------------------'''
+instances = [1, 5, 9, 13] # Golden instances, for large scale set 1-20
+islands = [1, 2, 4, 8] # numbers of colonies, 1 is the single colony
+gap = 0.05 # gap to the best known solution
+Iterations = 20000 # iterations of each run
+Migration = 100 # iterations between two exchanges of colonies
+algorithm = 3 # enhanced ABC algorithm
+Seed = 1 # seed of the benchmark
+
+if __name__ == '__main__':
+    m.Migration = Migration
+    m.Gap = gap # stop each run when it reaches the gap
+    records = {'instance': [], 'islands': [], 'wall': [], 'gapwall': [], 'gapiteration': [], 'finalgap': []}
+    for instance in instances:
+        inst = Instance(2, instance, m.Size, delta=m.delta, dtype=m.dtype, K=m.Neighbors, Granular=m.Granular, Seeding=m.Seeding)
+        for n in islands:
+            'one run with n colonies, time it by the wall clock'
+            m.Islands = n
+            start = time.perf_counter()
+            if n > 1:
+                history, runtime = m.runIslands(inst, algorithm, 0, Iterations, Seed)
+            else:
+                history, runtime = m.run(inst, algorithm, 0, Iterations, Seed)
+            wall = time.perf_counter() - start
+
+            'the first iteration reaching the gap, and the wall-clock time till the run stopped there'
+            reach = np.flatnonzero(history.feasibest <= inst.BestKnown*(1+gap))
+            if len(history.feasisol) > 0 and len(reach) > 0:
+                gapiteration = int(history.iteration[reach[0]])
+                gapwall = wall
+            else: # the gap is not reached in Iterations
+                gapiteration = -1
+                gapwall = np.nan
+
+            records['instance'].append(inst.File)
+            records['islands'].append(n)
+            records['wall'].append(wall)
+            records['gapwall'].append(gapwall)
+            records['gapiteration'].append(gapiteration)
+            records['finalgap'].append(history.feasible/inst.BestKnown - 1 if len(history.feasisol) > 0 else np.nan)
+
+    'print and save the results of benchmark'
+    records = pd.DataFrame(records)
+    print(records.to_string(index=False))
+    os.makedirs('Results', exist_ok=True)
+    records.to_csv('Results\\benchmark-islands-' + time.strftime("%Y%m%d %H%M%S", time.localtime()) + '.csv', index=False)
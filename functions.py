@@ -3,58 +3,200 @@ Functions
 
 Environment: Python 3.7.3, IDE: Spyder, CPU: 3.00GHz
 """
+import time
+import json
+import bisect
+import operator
 import numpy
-import random
-import matplotlib.pyplot as plt
+from collections import deque
 
-from main import Capacity, Duration, ServiceTime, Vehicles, Coordinates, Distance, Demand, Size, Limit, delta     
+'''****************************Random numbers**********************************
+Aims:
+    the stream of random numbers of a run, built on numpy.random.Generator, 
+    the uniform numbers are drawn in blocks and handed out one by one, so 
+    that a random position costs one multiplication instead of a call of the
+    generator, and the positions of the operators are sampled in constant 
+    time without rejection
+    1.  seed - start the stream again from a seed, each run has its own seed
+    2.  random - a uniform number in [0, 1)
+    3.  integer - a uniform integer in [0, n)
+    4.  choice - a uniform element of a sequence
+    5.  sample - k different positions in [0, n) in increasing order, by the
+        algorithm of Floyd, k draws whatever positions were drawn before
+    6.  generator - numpy.random.Generator for the blocks of vectorized 
+        draws, eg. the permutations of initial
+    7.  state, load - the state of the generator and the numbers left in the
+        block as arrays for the checkpoint and back
+Inputs:
+    1.  seed (int) - seed of the stream, None for fresh entropy
+    2.  block (int) - the number of uniform numbers drawn at once, default 4096
+    3.  n, k (int) - the range and number of positions
+    4.  seq (list) - a sequence to choose from
+Returns:
+    rng (Stream) - the stream of the process, seeded by main.run
+****************************************************************************'''
+class Stream:
+    def __init__(self, seed=None, block=4096):
+        self.block = block
+        self.seed(seed)
+    
+    def seed(self, seed=None):
+        self.generator = numpy.random.default_rng(seed)
+        self.fill([])
+    
+    def fill(self, values):
+        self.buffer = values
+        self.next = iter(values).__next__
+    
+    def random(self):
+        try:
+            return self.next()
+        except StopIteration: # the block is used up, draw the next one
+            self.fill(self.generator.random(self.block).tolist())
+            return self.next()
+    
+    def integer(self, n):
+        return int(self.random()*n)
+    
+    def choice(self, seq):
+        return seq[int(self.random()*len(seq))]
+    
+    def sample(self, n, k):
+        chosen = []
+        for j in range(n-k, n):
+            t = int(self.random()*(j+1))
+            chosen.append(j if t in chosen else t)
+        chosen.sort()
+        return chosen
+    
+    def state(self):
+        left = self.buffer[len(self.buffer) - operator.length_hint(self.next.__self__):]
+        return numpy.array(json.dumps(self.generator.bit_generator.state)), numpy.array(left, dtype=numpy.float64)
+    
+    def load(self, generator, left):
+        self.generator = numpy.random.default_rng()
+        self.generator.bit_generator.state = json.loads(str(generator))
+        self.fill(left.tolist())
+
+rng = Stream()
 
 '''*******************Initial solution generation******************************
 Aims:
-    generate initial solutions of CVRP
+    generate initial solutions of CVRP, all solutions of a call are generated
+    together, one random permutation of the customers for each solution
+    1.  random - the customers are visited in the order of the permutation,
+        each one is assigned to the vehicle nearest to it, for all solutions 
+        at once
+    2.  sweep - the customers are swept by their polar angle around the depot
+        from a random angle, and a new route starts when the capacity is full
+    3.  savings - the routes are merged by the savings of Clarke and Wright 
+        between each customer and its candidate list, the savings are 
+        perturbed randomly so that the solutions are different
 Inputs:
-    size (int) - the size of employed bee, half of the colony size
+    1.  inst (Instance) - the studied instance and the parameters of experiment
+    2.  size (int) - the number of solutions generated
 Returns:
     solutions (list) - a set of solutions with size equaling input Size, 
-    [[solution1], [solution2], ..., [solutioni]]
+    [[solution1], [solution2], ..., [solutioni]], each solution is an int32 
+    array
 ****************************************************************************'''
-def initial(size):
-    solutions = []
-    x = []
-    for j in range(size):       
-        
-        currentVehicleLoc = list(numpy.arange(Vehicles)*0) # current position of vehicle, format: list [0,0,0,0,0,0]             
-        routes_list =[[0] for i in range(Vehicles)] # initial route list, format: [[0],[0],[0],[0],[0],[0]]            
-        x, y = numpy.hsplit(numpy.array(Coordinates), 2) # split location into X, Y                 
-        Array_Dis = numpy.array(Distance) # change into array format for convenience                                   
-        remainLoc = list(numpy.arange(1, len(Coordinates)))# generate customer id from 1 to 50
-
-        'select a customer randomly'
-        for i in range(len(remainLoc)):
-            random_item_from_list = random.choice(remainLoc) # randomly pick a customer from the list
-            remainLoc.remove(random_item_from_list) # remove it
-            'obtain the distance between all vehicles and the selected customer'
-            compareList = [] # list for comparison
-            for i in range(Vehicles): # loop for filling the list
-                compareList.append(Array_Dis[currentVehicleLoc[i]][random_item_from_list])    
-            'assign the customer to the nearest vehicle'
-            # update the vehicle position with the customer location
-            currentVehicleLoc[compareList.index(min(compareList))] = random_item_from_list 
-            # append it subsequently in corresponding route number
-            routes_list[compareList.index(min(compareList))].append(random_item_from_list)  
-        
-        for i in range(1, len(routes_list)):
-            routes_list[0].extend(routes_list[i])
-        solutions.append(routes_list[0][1:len(routes_list[0])])
+def initial(inst, size):
+    n = inst.Dimension - 1 # customers
+    V = inst.Vehicles
+    rows = numpy.arange(size)[:, numpy.newaxis]
+    'one random permutation of the customers for each solution'
+    order = numpy.argsort(rng.generator.random((size, n)), axis=1) + 1
+    
+    if inst.Seeding == 'sweep':
+        'sweep the customers by the polar angle from a random angle, with the permutation breaking ties'
+        angle = numpy.arctan2(inst.Coordinates[1:, 1] - inst.Coordinates[0, 1], inst.Coordinates[1:, 0] - inst.Coordinates[0, 0])
+        angle = (angle[numpy.newaxis, :] - rng.generator.uniform(-numpy.pi, numpy.pi, (size, 1))) % (2*numpy.pi)
+        order = order[rows, numpy.argsort(angle[rows, order - 1], axis=1, kind='stable')]
+        'a new route when the next customer does not fit in the load of the route, the rest in the last route'
+        demand = inst.Demand[order]
+        load = numpy.zeros(size, dtype=demand.dtype) # load of the current route of each solution
+        vehicle = numpy.empty((size, n), dtype=numpy.int64)
+        current = numpy.zeros(size, dtype=numpy.int64)
+        for i in range(n):
+            full = (load + demand[:, i] > inst.Capacity) & (current < V - 1)
+            current += full
+            load = numpy.where(full, 0, load) + demand[:, i]
+            vehicle[:, i] = current
+    elif inst.Seeding == 'savings':
+        return [savings(inst) for j in range(size)]
+    else:
+        'assign the customers of all solutions to their nearest vehicles'
+        loc = numpy.zeros((size, V), dtype=numpy.int64) # current position of vehicles
+        vehicle = numpy.empty((size, n), dtype=numpy.int64)
+        for i in range(n):
+            customer = order[:, i]
+            nearest = numpy.argmin(inst.Distance[loc, customer[:, numpy.newaxis]], axis=1)
+            loc[rows[:, 0], nearest] = customer
+            vehicle[:, i] = nearest
+    
+    'the routes one after another, each vehicle after as many depots as vehicles before it'
+    rank = numpy.argsort(vehicle, axis=1, kind='stable')
+    x = numpy.zeros((size, n + V - 1), dtype=numpy.int32)
+    x[rows, numpy.arange(n) + vehicle[rows, rank]] = order[rows, rank]
+    return list(x)
 
-    return solutions
+def savings(inst):
+    D = inst.Distance
+    Demand = inst.Demand.tolist()
+    'the savings of serving a customer and its nearest ones in one route, perturbed randomly'
+    a = numpy.repeat(numpy.arange(1, inst.Dimension), [len(c) for c in inst.Candidates[1:]])
+    b = numpy.concatenate(inst.Candidates[1:])
+    save = (D[a, 0] + D[0, b] - D[a, b])*rng.generator.uniform(0.8, 1.2, len(a))
+    rank = numpy.argsort(-save, kind='stable')
+    
+    routes = {c: [c] for c in range(1, inst.Dimension)} # the route of each customer, by its first customer
+    first = list(range(inst.Dimension)) # the first customer of the route of each customer
+    load = {c: Demand[c] for c in range(1, inst.Dimension)}
+    for k in rank.tolist():
+        if save[k] <= 0:
+            break
+        u, v = int(a[k]), int(b[k])
+        ru, rv = first[u], first[v]
+        if ru == rv or load[ru] + load[rv] > inst.Capacity:
+            continue
+        U, W = routes[ru], routes[rv]
+        'join two routes when u and v are at their ends'
+        if U[-1] == u and W[0] == v:
+            U = U + W
+        elif U[0] == u and W[-1] == v:
+            U = W + U
+        elif U[-1] == u and W[-1] == v:
+            U = U + W[::-1]
+        elif U[0] == u and W[0] == v:
+            U = U[::-1] + W
+        else:
+            continue
+        del routes[ru], routes[rv]
+        routes[U[0]] = U
+        load[U[0]] = load.pop(ru) + load.pop(rv)
+        for c in U:
+            first[c] = U[0]
+    
+    'merge the lightest routes when there are more routes than vehicles'
+    routes = list(routes.values())
+    while len(routes) > inst.Vehicles:
+        routes.sort(key=lambda R: sum([Demand[c] for c in R]))
+        R = routes.pop(0)
+        routes[0] = R + routes[0]
+    routes += [[] for i in range(inst.Vehicles - len(routes))]
+    routes = [routes[k] for k in rng.generator.permutation(len(routes))]
+    x = []
+    for R in routes:
+        x += R + [0]
+    return numpy.array(x[:-1], dtype=numpy.int32)
 
 '''*************************Solution calculation*******************************
 Aims:
     calculate the travel distance, load, service time and generate traces of 
     each vehicle in the solution
-Inputs: 
-    x (list) - a solution, [1, 2, 0, 3, 4, 0, 5, 6]
+Inputs:
+    1.  inst (Instance) - the studied instance and the parameters of experiment
+    2.  x (array) - a solution, [1, 2, 0, 3, 4, 0, 5, 6]
 Returns:
     1.  load (list) - load of each vehicle, [1, 2, ..., 3]
     2.  traveldis (list) - the travel distance of each vehicle, [1, 2, ..., 3]
@@ -62,77 +204,82 @@ Returns:
     4.  trace (list) - the total service time of each vehicle, 
         [[0, 1, 0], [0, 2, 0], ..., [0, i, 0]]
 ****************************************************************************'''
-def calSol(x):
+def calSol(inst, x):
     'generate the trace of each vehicle'
-    x1 = x[:]
-    trace = [[0] for i in range(Vehicles)]
-    t = 0
-    for i in range(len(x1)):
-        if x1[i] != 0:
-            trace[t].extend([x1[i]])
-        else:
-            trace[t].extend([0])
-            t += 1
-    trace[Vehicles-1].extend([0])
-       
-    traveldis = []
-    load = []
-    stime=[]
-    for car in range(Vehicles):        
-        'calculate the travel distance of each vehicle'
-        x=0
-        for k in range(len(trace[car])-1):
-            x = x + Distance[trace[car][k]][trace[car][k + 1]]
-        traveldis.append(x)
-        'calculate the travel distance of each vehicle'
-        x=0
-        for k in trace[car]:
-            x = x + Demand[k]
-        load.append(x)        
-        'calculate the service time of each vehicle'
-        stime.append((len(trace[car])-2)*ServiceTime)
-    
-    return load, traveldis, stime, trace
+    p = numpy.concatenate(([0], x, [0])) # solution starts and ends at depot
+    zpos = numpy.flatnonzero(p == 0) # each vehicle travels between two consecutive depots
+    trace = [p[zpos[car]:zpos[car+1]+1].tolist() for car in range(inst.Vehicles)]
+    
+    'calculate the travel distance of each vehicle'
+    traveldis = numpy.add.reduceat(inst.Distance[p[:-1], p[1:]], zpos[:-1]) # gather the distances of consecutive vertices
+    'calculate the load of each vehicle'
+    load = numpy.add.reduceat(inst.Demand[p[:-1]], zpos[:-1])
+    'calculate the service time of each vehicle'
+    stime = (numpy.diff(zpos)-1)*inst.ServiceTime
+    
+    return load.tolist(), traveldis.tolist(), stime.tolist(), trace
 
 '''*************************Cost function calculation**************************
 Aims:
     calculate the cost fo solutions, including travel cost, the violation of 
     capacity and duration constraints
 Inputs:
-    1.  sol (list) - a set of solutions, [[solution1], [solution2], ..., [solutioni]]
-    2.  alpha (float) - coefficient of the violation of capacity constraints 
-    3.  beta (float) - coefficient of the violation of duration constraints
+    1.  inst (Instance) - the studied instance and the parameters of experiment
+    2.  sol (list) - a set of solutions, [[solution1], [solution2], ..., [solutioni]],
+        or a 2D array with one solution in each row, the solutions without 
+        current evaluation are calculated together in a few array operations
+    3.  alpha (float) - coefficient of the violation of capacity constraints 
+    4.  beta (float) - coefficient of the violation of duration constraints
+    5.  evals (list) - optional, the evaluations of solutions, the cached 
+        totals are read instead of calculating the solution again
 Returns:
     1.  Allfit (list) - the fitness of each solution
     2.  CapVio (list) - the violation of capacity constraint of each solution
     3.  CapVio (list) - the violation of duration constraint of each solution
 ****************************************************************************'''
-def fun(sol, alpha, beta):
-    Allfit = []
-    CapVio = []
-    DurVio = []
-
+def fun(inst, sol, alpha, beta, evals=None):
+    fit1 = [0.0]*len(sol) # objective value of each solution
+    vio1 = [0.0]*len(sol) # the violation of capacity constraint of each solution
+    vio2 = [0.0]*len(sol) # the violation of duration constraint of each solution
+    batch = [] # index of the solutions calculated together
+    
     for j in range(len(sol)):
-        'calculate the travel distance, service time and load of each solution'
-        Load, traveldis, stime, trace = calSol(sol[j])
-
-        fit=0
-        vio1=0
-        vio2=0
-        fit1=float(sum(traveldis))
-        for jl in range(Vehicles):
-            'the violation of capacity constraint'
-            if Load[jl]-Capacity>0:
-                vio1=vio1+(Load[jl]-Capacity)
-            'the violation of duration constraint'
-            if traveldis[jl]+stime[jl]-Duration>0:
-                vio2=vio2+((traveldis[jl]+stime[jl])-Duration)
-        'cost function, objective value plus penalty value'
-        fit = fit1 + alpha*vio1 + beta*vio2
+        if evals is not None and evals[j] is not None and evals[j]['x'] is sol[j]:
+            'read the cached travel distance and violations of the solution'
+            fit1[j] = evals[j]['distance']
+            vio1[j] = evals[j]['capvio']
+            vio2[j] = evals[j]['durvio']
+        else:
+            batch.append(j)
+    
+    if batch:
+        'the solutions as one 2D array, each row starts and ends at depot'
+        X = numpy.asarray([sol[j] for j in batch])
+        P = numpy.zeros((len(batch), X.shape[1]+2), dtype=X.dtype)
+        P[:, 1:-1] = X
+        'the route of each edge, numbered through all solutions'
+        route = numpy.cumsum(P[:, :-1] == 0, axis=1) - 1 + inst.Vehicles*numpy.arange(len(batch))[:, None]
+        route = route.ravel()
+        n = len(batch)*inst.Vehicles
         
-        Allfit.append(fit)
-        CapVio.append(vio1)
-        DurVio.append(vio2)
+        'calculate the travel distance, service time and load of each vehicle of each solution'
+        traveldis = numpy.bincount(route, inst.Distance[P[:, :-1], P[:, 1:]].ravel(), n).reshape(-1, inst.Vehicles)
+        load = numpy.bincount(route, inst.Demand[P[:, :-1]].ravel(), n).reshape(-1, inst.Vehicles)
+        stime = numpy.bincount(route, (P[:, :-1] != 0).ravel(), n).reshape(-1, inst.Vehicles)*inst.ServiceTime
+        
+        'the violation of capacity and duration constraint'
+        capvio = numpy.maximum(load - inst.Capacity, 0).sum(axis=1)
+        durvio = numpy.maximum(traveldis + stime - inst.Duration, 0).sum(axis=1)
+        traveldis = traveldis.sum(axis=1)
+        for k, j in enumerate(batch):
+            fit1[j] = float(traveldis[k])
+            vio1[j] = float(capvio[k])
+            vio2[j] = float(durvio[k])
+    
+    'cost function, objective value plus penalty value'
+    Allfit = [fit1[j] + alpha*vio1[j] + beta*vio2[j] for j in range(len(sol))]
+    CapVio = vio1
+    DurVio = vio2
         
     return Allfit, CapVio, DurVio
 
@@ -140,188 +287,540 @@ def fun(sol, alpha, beta):
 Aims:
     select a current solution based on its fitness
 Inputs:
-    1.  solfit (list) - list of the fitness of current solutions
-    2.  solutions (list) - set of current solutions
+    1.  inst (Instance) - the studied instance and the parameters of experiment
+    2.  solfit (list) - list of the fitness of current solutions
+    3.  solutions (list) - set of current solutions
 Returns:
     1.  choosesol (list) -  set of selected solutions from current solutions
     2.  sourceid (list) - list of index of selected solutions in current 
         solutions set, eg. sourceid[0] = 1 means the 2nd current solution was 
         selected by the 1st onlooker
 ****************************************************************************'''
-def choose(solfit, solutions):
-    fit=solfit[:]
-    sol=solutions[:]
+def choose(inst, solfit, solutions):
+    'the probability of each current solution, cumulated as the roulette wheel'
+    fit = 1/numpy.asarray(solfit)
+    Fit = numpy.cumsum(fit/fit.sum())
     
-    for j in range(len(fit)):
-        fit[j] = 1/fit[j]
-        
-    s = sum(fit)
-    for j in range(len(fit)):
-        fit[j] = fit[j] / s
-
-    Fit = numpy.zeros(len(fit) + 1)
-    for j in range(len(fit)):
-        Fit[j + 1] = Fit[j] + fit[j]
-
-    choosesol = []
-    sourceid=[]
-    for j in range(Size):
-        n = random.random()
-        for k in range(len(Fit) - 1):
-            if n >= Fit[k] and n <= Fit[k + 1]:
-                choosesol.append(sol[k])
-                sourceid.append(k)
-                break
+    'spin the wheel for all onlookers at once, each lands on the first cumulative probability not below it'
+    n = rng.generator.random(inst.Size)
+    sourceid = numpy.searchsorted(Fit, n).clip(max=len(Fit)-1).tolist() # clip the rounding error of the last one
+    choosesol = [solutions[k] for k in sourceid]
     return choosesol,sourceid
 
 '''**********************Neighborhood operators********************************
 Aims:
     select one of the neighbor operators and apply to a current solution by 
-    pick positions to divided solution into pieces and perform operators
+    pick positions to divided solution into pieces and perform operators, in 
+    the granular mode of instances with candidate lists, the swaps, insertions 
+    and reversing (operators 1, 3 and 5) pick the first customer at random and 
+    the second one from the nearest customers of the first, so the customers 
+    paired are close to each other
 Inputs:
-    x (list) - a current solution used as source in neighborhood operations
+    1.  inst (Instance) - the studied instance and the parameters of experiment
+    2.  x (array) - a current solution used as source in neighborhood operations
+    3.  operators (list) - a combination of neighborhood operators, values 1-7,
+        or a Selector choosing among them
+    4.  segs (list) - a move, see returns of move
+    5.  pos (list) - optional, the position of each customer in x for the 
+        granular mode, calculated from x if not given
 Returns:
-    x (list) -  a neighbor solution generated by selected neighborhood operator
+    1.  move - segs (list) - the pieces of current solution that make up the 
+        neighbor solution in order, [(start, end, reversed), ...], eg. 
+        [(0, 2, False), (5, 8, True), (2, 5, False), (8, 10, False)] means 
+        x[0:2] + reversed x[5:8] + x[2:5] + x[8:10]
+    2.  apply - x (array) - the neighbor solution made up by a move
+    3.  change - x (array) -  a neighbor solution generated by selected 
+        neighborhood operator
 ****************************************************************************'''
-def change(x, operators):
-    'pick one of the neighborhood operator from the predetermined set'
-    changerandom = random.choice(operators)
+def move(inst, x, operators, pos=None):
+    'pick one of the neighborhood operator from the predetermined set, or by the selector'
+    changerandom = operators.pick() if isinstance(operators, Selector) else rng.choice(operators)
+    L = len(x)
+    if inst.Granular and changerandom in (1, 3, 5) and pos is None:
+        pos = numpy.zeros(inst.Dimension, dtype=numpy.int64)
+        pos[numpy.asarray(x)] = numpy.arange(L)
+    
+    'granular mode, a random customer and one of its nearest customers'
+    if inst.Granular and changerandom in (1, 3, 5):
+        c = 1 + rng.integer(inst.Dimension - 1)
+        a = pos[c]
+        b = pos[rng.choice(inst.Candidates[c])]
+        if changerandom == 1: # swap the customers
+            index1, index2 = min(a, b), max(a, b)
+            segs = [(0, index1, False), (index2, index2+1, False), (index1+1, index2, False), 
+                    (index1, index1+1, False), (index2+1, L, False)]
+        elif changerandom == 3: # insert the first customer next to the second
+            if b <= a:
+                segs = [(0, b, False), (a, a+1, False), (b, a, False), (a+1, L, False)]
+            else:
+                segs = [(0, a, False), (a+1, b+1, False), (a, a+1, False), (b+1, L, False)]
+        else: # reverse the part between them, so that they are visited one after another
+            if b > a:
+                segs = [(0, a+1, False), (a+1, b+1, True), (b+1, L, False)]
+            else:
+                segs = [(0, b, False), (b, a, True), (a, L, False)]
+        return segs
     
     'Random swaps'   
     if changerandom == 1:      
-        judge=0 # pick two positions
-        while judge==0:
-            index1=random.randint(0, len(x)-1)
-            index2=random.randint(0, len(x)-1)
-            if x[index1]!=x[index2] and x[index1] != 0 and x[index2] != 0:            
-                judge=1        
-        x1=x[:] # swap the customers
-        x1[index1], x1[index2] = x1[index2], x1[index1]
-        x=x1        
+        # pick two different customers, and their positions
+        c1, c2 = rng.sample(inst.Dimension - 1, 2)
+        if pos is None:
+            tour = numpy.asarray(x)
+            index1, index2 = sorted((int((tour == c1+1).argmax()), int((tour == c2+1).argmax())))
+        else:
+            index1, index2 = sorted((pos[c1+1], pos[c2+1]))
+        # swap the customers
+        segs = [(0, index1, False), (index2, index2+1, False), (index1+1, index2, False), 
+                (index1, index1+1, False), (index2+1, L, False)]
     'Random swaps of sebsequences'
     if changerandom == 2: 
         # pick four positions
-        a = [i for i in range(len(x))]
-        index=numpy.sort(random.sample(a,4))        
+        index = rng.sample(L, 4)
         # swaps the subsequences
-        x1=[]
-        x1.extend(x[0:index[0]])
-        x1.extend(x[index[2]:index[3]])
-        x1.extend(x[index[1]:index[2]])
-        x1.extend(x[index[0]:index[1]])
-        x1.extend(x[index[3]:len(x)])
-        x=x1        
+        segs = [(0, index[0], False), (index[2], index[3], False), (index[1], index[2], False), 
+                (index[0], index[1], False), (index[3], L, False)]
     'Random insertions'
     if changerandom == 3:
-        # pick two positions
-        judge=0
-        while judge==0:
-            index1=random.randint(0, len(x)-1)
-            index2=random.randint(0, len(x)-1)
-            if x[index1]!=x[index2] and x[index1] != 0 and x[index2] != 0:            
-                judge=1
         # insert the customer in the first position to the second position
-        x1=x[:]
-        a=random.randint(0,len(x)-1)
-        del x1[a]
-        b=random.randint(0,len(x)-1)
-        x1.insert(b,x[a])
-        x=x1   
+        a = rng.integer(L)
+        b = rng.integer(L)
+        if b <= a:
+            segs = [(0, b, False), (a, a+1, False), (b, a, False), (a+1, L, False)]
+        else:
+            segs = [(0, a, False), (a+1, b+1, False), (a, a+1, False), (b+1, L, False)]
     'Random insertions of subquences'
     if changerandom == 4:
         # pick three positions
-        a = [i for i in range(len(x))]
-        index=numpy.sort(random.sample(a,3))
+        index = rng.sample(L, 3)
         # reorder the subsequences
-        x1=[]
-        x1.extend(x[0:index[0]])
-        x1.extend(x[index[1]:index[2]])
-        x1.extend(x[index[0]:index[1]])
-        x1.extend(x[index[2]:len(x)])
-        x=x1
+        segs = [(0, index[0], False), (index[1], index[2], False), (index[0], index[1], False), 
+                (index[2], L, False)]
     'Reversing a subsequence'
     if changerandom == 5:
         #pick two positions
-        index=random.randint(0,len(x)-2)
-        length=random.randint(2,len(x)-index)
+        index = rng.integer(L-1)
+        length = 2 + rng.integer(L-index-1)
         # reverse the middle part of solutions
-        x1=[]
-        x1.extend(x[0:index])
-        x2=x[index:index+length]
-        x2.reverse()
-        x1.extend(x2)
-        x1.extend(x[index+length:len(x)])
-        x=x1
+        segs = [(0, index, False), (index, index+length, True), (index+length, L, False)]
     'Random swaps of reversed subsequences'
     if changerandom == 6:
-        # pick four positions
-        index=[1,2,3,4]
-        a = [i for i in range(len(x))]
-        while index[1] - index[0] < 2 or index[2] - index[1] < 2 or index[3] - index[2] < 2:
-            index = numpy.sort(random.sample(a,4))
+        # pick four positions at least two apart, four positions of a shorter range spread by 0, 1, 2, 3
+        index = [i + k for k, i in enumerate(rng.sample(L-3, 4))]
         # reorder the subsequences and reverse the swaped one with 50% chance
-        x1=[]
-        x1.extend(x[0:index[0]])
-        x2 = x[index[2]:index[3]]
-        # probability of reversed, 0 no reversed and 1 reversed
-        if random.choice([0, 1]) == 0:
-            x1.extend(x2)
-        else:
-            x2.reverse()
-            x1.extend(x2)    
-        x1.extend(x[index[1]:index[2]])    
-        x2 = x[index[0]:index[1]]
-        if random.choice([0, 1]) == 0:
-            x1.extend(x2)
-        else:
-            x2.reverse()
-            x1.extend(x2)    
-        x1.extend(x[index[3]:len(x)])
-        x=x1
+        reverse1 = rng.random() < 0.5
+        reverse2 = rng.random() < 0.5
+        segs = [(0, index[0], False), (index[2], index[3], reverse1), (index[1], index[2], False), 
+                (index[0], index[1], reverse2), (index[3], L, False)]
     'Random insertions of reversed subsequences'
     if changerandom == 7:
         # pick three positions
-        a = [i for i in range(len(x))]
-        index=numpy.sort(random.sample(a,3))
+        index = rng.sample(L, 3)
         # reorder the subsequences and reverse the swaped one with 50% chance
-        x1=[]
-        x1.extend(x[0:index[0]])
-        x2 = x[index[1]:index[2]]
-        if random.choice([0, 1]) == 0:
-            x1.extend(x2)
+        reverse1 = rng.random() < 0.5
+        segs = [(0, index[0], False), (index[1], index[2], reverse1), (index[0], index[1], False), 
+                (index[2], L, False)]
+    
+    return segs
+
+def apply(x, segs):
+    out = numpy.empty(len(x), dtype=numpy.int32)
+    i = 0 # position in neighbor solution where the piece is written
+    for a, b, reverse in segs:
+        if reverse:
+            out[i:i+b-a] = x[a:b][::-1]
         else:
-            x2.reverse()
-            x1.extend(x2)    
-        x1.extend(x[index[0]:index[1]])
-        x1.extend(x[index[2]:len(x)])
-        x=x1
+            out[i:i+b-a] = x[a:b]
+        i += b - a
+    return out
+
+def change(inst, x, operators):
+    return apply(x, move(inst, x, operators))
+
+'''**************************Operator selection********************************
+Aims:
+    choose the neighborhood operator of each move, uniformly or adaptively by
+    adaptive pursuit, the quality of each operator is its improvement of 
+    fitness per second in recent iterations, and the probability of the 
+    best one is pursued toward pmax and of the others toward pmin
+    1.  pick - choose an operator by the current probabilities
+    2.  record - count one application of the last operator picked, with the 
+        change of fitness it made and the time it took, by the performance 
+        counter, which is fine grained and cheap to read on every move
+    3.  adapt - update the quality and probabilities once per iteration
+    4.  add - add the counters of another selector, eg. of another colony
+    5.  table - the counters of each operator as an array
+    6.  state, load - the counters and probabilities as an array for the 
+        checkpoint and back
+Inputs:
+    1.  operators (list) - a combination of neighborhood operators, values 1-7
+    2.  adaptive (bool) - whether the probabilities adapt, default False for
+        uniform choice
+    3.  pmin (float) - the least probability of each operator, default 0.05
+    4.  rate (float) - the learning rate of quality and probabilities, 
+        default 0.1
+Attributes:
+    1.  probability (array) - the probability of each operator
+    2.  applications, improvements (list) - the moves made by each operator 
+        and those improving the fitness of their current solutions
+    3.  delta (list) - the sum of changes of fitness made by each operator
+    4.  time (list) - time in seconds spent by each operator
+Returns:
+    table - [[operator, applications, improvements, mean delta, time, 
+    probability], ...]
+****************************************************************************'''
+class Selector:
+    def __init__(self, operators, adaptive=False, pmin=0.05, rate=0.1):
+        self.operators = list(operators)
+        self.adaptive = adaptive
+        n = len(self.operators)
+        self.pmin = min(pmin, 1/n)
+        self.pmax = 1 - (n-1)*self.pmin
+        self.rate = rate
+        self.probability = numpy.full(n, 1/n)
+        self.cumulative = numpy.cumsum(self.probability).tolist()
+        self.quality = numpy.zeros(n)
+        self.index = {op: k for k, op in enumerate(self.operators)}
+        self.last = 0 # the index of the last operator picked
+        'the counters of the run, and the gain and time since the last adapt, lists as they are counted on every move'
+        self.applications = [0]*n
+        self.improvements = [0]*n
+        self.delta = [0.0]*n
+        self.time = [0.0]*n
+        self.gain = [0.0]*n
+        self.spent = [0.0]*n
+    
+    def pick(self):
+        if self.adaptive:
+            self.last = min(bisect.bisect(self.cumulative, rng.random()), len(self.operators) - 1)
+        else:
+            self.last = self.index[rng.choice(self.operators)]
+        return self.operators[self.last]
+    
+    def record(self, delta, seconds):
+        k = self.last
+        self.applications[k] += 1
+        self.delta[k] += delta
+        self.time[k] += seconds
+        self.spent[k] += seconds
+        if delta < 0: # the neighbor solution is better than its current solution
+            self.improvements[k] += 1
+            self.gain[k] -= delta
+    
+    def adapt(self):
+        if not self.adaptive:
+            return
+        gain = numpy.array(self.gain)
+        spent = numpy.array(self.spent)
+        used = spent > 0
+        self.quality[used] += self.rate*(gain[used]/spent[used] - self.quality[used])
+        target = numpy.full(len(self.operators), self.pmin)
+        target[numpy.argmax(self.quality)] = self.pmax
+        self.probability += self.rate*(target - self.probability)
+        self.cumulative = numpy.cumsum(self.probability).tolist()
+        self.gain = [0.0]*len(self.operators)
+        self.spent = [0.0]*len(self.operators)
+    
+    def add(self, other):
+        self.applications = [a + b for a, b in zip(self.applications, other.applications)]
+        self.improvements = [a + b for a, b in zip(self.improvements, other.improvements)]
+        self.delta = [a + b for a, b in zip(self.delta, other.delta)]
+        self.time = [a + b for a, b in zip(self.time, other.time)]
     
-    return x
+    def table(self):
+        mean = numpy.array(self.delta)/numpy.maximum(self.applications, 1)
+        return numpy.column_stack((self.operators, self.applications, self.improvements, mean, self.time, self.probability))
+    
+    def state(self):
+        return numpy.vstack((self.applications, self.improvements, self.delta, self.time, self.gain, self.spent, 
+                             self.probability, self.quality))
+    
+    def load(self, state):
+        self.applications = state[0].astype(numpy.int64).tolist()
+        self.improvements = state[1].astype(numpy.int64).tolist()
+        self.delta, self.time, self.gain, self.spent = [row.tolist() for row in state[2:6]]
+        self.probability, self.quality = [row.copy() for row in state[6:]]
+        self.cumulative = numpy.cumsum(self.probability).tolist()
+
+'''**********************Delta evaluation**************************************
+Aims:
+    evaluate a neighbor solution by the change of cost of the move from its 
+    current solution in constant time, instead of decoding and summing the 
+    whole neighbor solution again
+    1.  evaluate - decode a current solution once into cumulative sums of 
+        travel distance and load along the solution, and cache the route 
+        boundaries, the travel distance, load and customers of each route
+    2.  build - make up the neighbor solution of an accepted move and its 
+        evaluation from the evaluation of current solution, the positions 
+        before the first and after the last piece moved are kept, and only 
+        the routes touched by the move are calculated again
+    3.  refresh - take the evaluations of the neighbor solutions built for
+        the current solutions replaced since the last refresh, and evaluate
+        the other replaced ones again
+    4.  calDelta - walk the pieces of a move, only the edges between pieces 
+        are added and removed, routes inside a piece are kept intact and only 
+        the routes made up at the joins of pieces are calculated
+    5.  changeDelta - apply a neighborhood operator and return the move with
+        its cost delta
+    6.  neighbors - the fitness, violations and moves of a neighbor for each 
+        of the current solutions, with the same contract as fun, a Selector 
+        records the change of fitness and time of each move
+    the evaluation keeps the solution as list and the cumulative sums as 
+    lists of Python floats, since calDelta reads them one by one and indexing
+    a list is several times faster than indexing an array, at the cost of 
+    about 130 bytes per customer for each solution instead of a few bytes
+Inputs:
+    1.  inst (Instance) - the studied instance and the parameters of experiment
+    2.  x (array) - a current solution
+    3.  solutions (list) - a set of current solutions
+    4.  evals (list) - the evaluations of current solutions
+    5.  newevals (list) - the evaluations of neighbor solutions from build
+    6.  ev (dict) - the evaluation of a current solution, see returns
+    7.  segs (list) - a move, see move
+    8.  operators (list) - a combination of neighborhood operators, values 1-7,
+        or a Selector choosing among them
+    9.  alpha (float) - coefficient of the violation of capacity constraints 
+    10. beta (float) - coefficient of the violation of duration constraints
+Returns:
+    1.  evaluate - ev (dict) - evaluation of a current solution, 'x' the 
+        solution itself, 'distance', 'capvio' and 'durvio' its objective value
+        and violations, 'tour' the solution as list for fast indexing, 'pos' 
+        the position of each customer in the solution, 'zpos' 
+        the positions of depot between routes, 'rdist', 'rload' and 'rcnt' 
+        the travel distance, load and customers of each route, the others 
+        are cumulative sums for calDelta
+    2.  build - ev (dict) - evaluation of the neighbor solution, ev['x'] is 
+        the neighbor solution
+    3.  refresh - evals (list) - the evaluations of current solutions
+    4.  calDelta - ddis, dcap, ddur (float) - the change of objective value, 
+        violation of capacity and duration constraint made by the move
+    5.  changeDelta - segs (list) and ddis, dcap, ddur (float)
+    6.  neighbors - moves (list), Allfit (list), CapVio (list), DurVio (list)
+****************************************************************************'''
+def evaluate(inst, x):
+    tour = numpy.asarray(x)
+    L = len(tour)
+    p = numpy.concatenate(([0], tour, [0])) # solution starts and ends at depot
+    'cumulative travel distance and load along the solution'
+    ce = numpy.concatenate(([0.0], numpy.cumsum(inst.Distance[p[:-1], p[1:]], dtype=numpy.float64)))
+    cl = numpy.concatenate(([0.0], numpy.cumsum(inst.Demand[p], dtype=numpy.float64)))
+    'positions of the depot separating the routes, and the number of them before each position'
+    zpos = numpy.flatnonzero(tour == 0)
+    zc = numpy.concatenate(([0], numpy.cumsum(tour == 0)))
+    'travel distance, load and customers of each route, and their violations'
+    s = numpy.concatenate(([0], zpos + 1)) # start of each route in p
+    e = numpy.concatenate((zpos + 1, [L + 1])) # end of each route in p
+    rdist = ce[e] - ce[s]
+    rload = cl[e] - cl[s]
+    rcnt = e - s - 1
+    rcap = numpy.maximum(rload - inst.Capacity, 0)
+    rdur = numpy.maximum(rdist + rcnt*inst.ServiceTime - inst.Duration, 0)
+    'position of each customer in the solution'
+    pos = numpy.zeros(inst.Dimension, dtype=numpy.int64)
+    pos[tour] = numpy.arange(L)
+    
+    ev = {'x': x, 'tour': tour.tolist(), 'pos': pos.tolist(), 'ce': ce.tolist(), 'cl': cl.tolist(), 'zpos': zpos.tolist(), 'zc': zc.tolist(), 
+          'rdist': rdist.tolist(), 'rload': rload.tolist(), 'rcnt': rcnt.tolist(), 
+          'cc': numpy.concatenate(([0.0], numpy.cumsum(rcap))).tolist(), # cumulative violations of capacity over routes
+          'cd': numpy.concatenate(([0.0], numpy.cumsum(rdur))).tolist(), # cumulative violations of duration over routes
+          'distance': float(ce[-1]), 'capvio': float(rcap.sum()), 'durvio': float(rdur.sum())}
+    return ev
+
+def build(inst, ev, segs):
+    x = apply(ev['x'], segs)
+    tour = x.tolist()
+    L = len(x)
+    
+    'the positions before c0 and from c1 on are kept in place by the move'
+    pieces = [seg for seg in segs if seg[0] < seg[1]]
+    c0 = pieces[0][1] if pieces[0][0] == 0 and not pieces[0][2] else 0
+    c1 = pieces[-1][0] if pieces[-1][1] == L and not pieces[-1][2] else L
+    c1 = max(c0, c1)
+    
+    'cumulative travel distance, load and number of depot in between, after c1 the distance is shifted'
+    p = numpy.array(([0] + tour + [0])[c0:c1+2])
+    ce = ev['ce']
+    cl = ev['cl']
+    zc = ev['zc']
+    window = (ce[c0] + numpy.cumsum(inst.Distance[p[:-1], p[1:]], dtype=numpy.float64)).tolist()
+    shift = window[-1] - ce[c1+1]
+    ce = ce[:c0+1] + window + [c + shift for c in ce[c1+2:]]
+    cl = cl[:c0+1] + (cl[c0] + numpy.cumsum(inst.Demand[p[:-1]], dtype=numpy.float64)).tolist() + cl[c1+2:]
+    zero = numpy.flatnonzero(p[1:-1] == 0)
+    zpos = ev['zpos'][:zc[c0]] + (zero + c0).tolist() + ev['zpos'][zc[c1]:]
+    zc = zc[:c0+1] + (zc[c0] + numpy.cumsum(p[1:-1] == 0)).tolist() + zc[c1+1:]
+    
+    'only the routes from the one at c0 to the one at c1 are calculated again'
+    r0 = zc[c0]
+    r1 = zc[c1]
+    rdist = ev['rdist'][:]
+    rload = ev['rload'][:]
+    rcnt = ev['rcnt'][:]
+    cc = ev['cc'][:r0+1]
+    cd = ev['cd'][:r0+1]
+    for r in range(r0, r1+1):
+        s = zpos[r-1] + 1 if r > 0 else 0 # start of the route in p
+        e = zpos[r] + 1 if r < len(zpos) else L + 1 # end of the route in p
+        rdist[r] = ce[e] - ce[s]
+        rload[r] = cl[e] - cl[s]
+        rcnt[r] = e - s - 1
+        cc.append(cc[r] + max(rload[r] - inst.Capacity, 0))
+        cd.append(cd[r] + max(rdist[r] + rcnt[r]*inst.ServiceTime - inst.Duration, 0))
+    'the violations of the routes after are shifted'
+    shift1 = cc[r1+1] - ev['cc'][r1+1]
+    shift2 = cd[r1+1] - ev['cd'][r1+1]
+    cc = cc + [c + shift1 for c in ev['cc'][r1+2:]]
+    cd = cd + [c + shift2 for c in ev['cd'][r1+2:]]
+    'only the customers between c0 and c1 are moved'
+    pos = ev['pos'][:]
+    for i in range(c0, c1):
+        pos[tour[i]] = i
+    
+    ev = {'x': x, 'tour': tour, 'pos': pos, 'ce': ce, 'cl': cl, 'zpos': zpos, 'zc': zc, 'rdist': rdist, 'rload': rload, 'rcnt': rcnt, 
+          'cc': cc, 'cd': cd, 'distance': ce[-1], 'capvio': cc[-1], 'durvio': cd[-1]}
+    return ev
+
+def refresh(inst, solutions, evals, newevals=[]):
+    for j in range(len(solutions)):
+        if evals[j] is None or evals[j]['x'] is not solutions[j]:
+            for ev in newevals: # the neighbor solution was built with its evaluation
+                if ev is not None and ev['x'] is solutions[j]:
+                    evals[j] = ev
+                    break
+            else:
+                evals[j] = evaluate(inst, solutions[j])
+    return evals
+
+def calDelta(inst, ev, segs):
+    D = inst.Distance
+    x = ev['tour']
+    ce = ev['ce']
+    cl = ev['cl']
+    zpos = ev['zpos']
+    zc = ev['zc']
+    cc = ev['cc']
+    cd = ev['cd']
+    
+    added = 0.0 # travel distance of the edges between pieces in neighbor solution
+    removed = 0.0 # travel distance of the edges between pieces in current solution
+    vio1 = 0.0 # the violation of capacity constraint of neighbor solution
+    vio2 = 0.0 # the violation of duration constraint of neighbor solution
+    last = 0 # the last vertex visited, start from depot
+    load = 0.0 # load of the open route
+    dis = 0.0 # travel distance of the open route
+    cnt = 0 # customers of the open route
+    for a, b, reverse in segs:
+        if a >= b: # empty piece
+            continue
+        if reverse:
+            first, final = x[b-1], x[a]
+        else:
+            first, final = x[a], x[b-1]
+        removed += D.item(x[a-1] if a > 0 else 0, x[a])
+        added += D.item(last, first)
+        
+        if zc[b] == zc[a]: 
+            'no depot in the piece, it extends the open route'
+            dis += D.item(last, first) + ce[b] - ce[a+1]
+            load += cl[b+1] - cl[a+1]
+            cnt += b - a
+        else:
+            'the piece before the first depot closes the open route'
+            z1 = zpos[zc[a]] # the first depot in the piece
+            z2 = zpos[zc[b]-1] # the last depot in the piece
+            if reverse:
+                u, v = z2 + 1, b
+            else:
+                u, v = a, z1
+            if u < v:
+                dis += D.item(last, x[v-1] if reverse else x[u]) + ce[v] - ce[u+1] + D.item(x[u] if reverse else x[v-1], 0)
+                load += cl[v+1] - cl[u+1]
+                cnt += v - u
+            else:
+                dis += D.item(last, 0)
+            vio1 += max(load - inst.Capacity, 0)
+            vio2 += max(dis + cnt*inst.ServiceTime - inst.Duration, 0)
+            'the routes between the first and last depot are kept intact'
+            vio1 += cc[zc[b]] - cc[zc[a]+1]
+            vio2 += cd[zc[b]] - cd[zc[a]+1]
+            'the piece after the last depot opens a new route'
+            if reverse:
+                u, v = a, z1
+            else:
+                u, v = z2 + 1, b
+            if u < v:
+                dis = D.item(0, x[v-1] if reverse else x[u]) + ce[v] - ce[u+1]
+                load = cl[v+1] - cl[u+1]
+                cnt = v - u
+            else:
+                dis = 0.0
+                load = 0.0
+                cnt = 0
+        last = final
+    'back to depot, close the last route'
+    removed += D.item(x[len(x)-1], 0)
+    added += D.item(last, 0)
+    dis += D.item(last, 0)
+    vio1 += max(load - inst.Capacity, 0)
+    vio2 += max(dis + cnt*inst.ServiceTime - inst.Duration, 0)
+    
+    return added - removed, vio1 - ev['capvio'], vio2 - ev['durvio']
+
+def changeDelta(inst, ev, operators):
+    segs = move(inst, ev['tour'], operators, ev['pos'])
+    ddis, dcap, ddur = calDelta(inst, ev, segs)
+    return segs, ddis, dcap, ddur
+
+def neighbors(inst, evals, operators, alpha, beta):
+    moves = []
+    Allfit = []
+    CapVio = []
+    DurVio = []
+    
+    selector = operators if isinstance(operators, Selector) else None
+    mark = time.perf_counter() # one reading of the clock between two moves
+    for ev in evals:
+        segs, ddis, dcap, ddur = changeDelta(inst, ev, operators)
+        vio1 = ev['capvio'] + dcap
+        vio2 = ev['durvio'] + ddur
+        'cost function, objective value plus penalty value'
+        fit = ev['distance'] + ddis + alpha*vio1 + beta*vio2
+        if selector: # the change of fitness from the current solution
+            now = time.perf_counter()
+            selector.record(ddis + alpha*dcap + beta*ddur, now - mark)
+            mark = now
+        
+        moves.append(segs)
+        Allfit.append(fit)
+        CapVio.append(vio1)
+        DurVio.append(vio2)
+    
+    return moves, Allfit, CapVio, DurVio
 
 '''**********************Neighbor solutions selection**************************
 Aims:
-    select the neighbor solution with best fitness
+    select the neighbor solution with best fitness for each current solution
+    selected by onlookers, in one grouping pass over all neighbor solutions
 Inputs:
-    1.  i (int) - the ith current solution
-    2.  nsolutionfit (list) - fitness of neighbor solutions
-    3.  sourceID (list) - index of current solutions, which were used as inputs
+    1.  nsolutionfit (list) - fitness of neighbor solutions
+    2.  sourceID (list) - index of current solutions, which were used as inputs
         in neighborhood operator
 Returns:
-    1.  minGi (float) - the fitness of best neighbor solution of all neighbor
-        solutions from ith current solution
-    2.  locGi (int) - the index of the best neighbor solution in the neighbor 
-        solution list
+    1.  sources (list) - index of the selected current solutions, ascending
+    2.  minGi (list) - the fitness of best neighbor solution of all neighbor
+        solutions from each selected current solution
+    3.  locGi (list) - the index of the best neighbor solution in the neighbor 
+        solution list, the first one when several are equally best
 ****************************************************************************''' 
-def generateGi(i, nsolutionfit, sourceID):
-    fitGi=[]
-    GiIndex = []
-    for j in range(len(sourceID)):
-        if sourceID[j] == i:
-            GiIndex.append(j)
-            fitGi.append(nsolutionfit[j])
-    minGi = min(fitGi)
-    locGi = GiIndex[fitGi.index(min(fitGi))]      
-    return minGi, locGi
+def generateGi(nsolutionfit, sourceID):
+    'sort the neighbor solutions by current solution, then by fitness, the first of each group is the best'
+    sourceID = numpy.asarray(sourceID)
+    order = numpy.lexsort((nsolutionfit, sourceID)) # stable, equal fitness keeps the order of onlookers
+    first = order[numpy.flatnonzero(numpy.diff(sourceID[order], prepend=-1))]
+    sources = sourceID[first].tolist()
+    minGi = numpy.asarray(nsolutionfit)[first].tolist()
+    locGi = first.tolist()
+    return sources, minGi, locGi
 
 '''***********************Solution renewal*************************************
 Aims:
@@ -332,23 +831,24 @@ Aims:
     3.  replace solution exceeding limit with a initial solution or a new 
         solution from neighborhood operators and calculate its violations
 Inputs:
-    1.  solutionfit (list) - the fitness of all current solutions 
-    2.  nsolutionfit (list) - the fitness of all new solutions
-    3.  solutions (list) - a set of current solutions
-    4.  newsolutions (list) - a set of new solutions
-    5.  lcount (list) - counter of the number of iterations that the fitness 
+    1.  inst (Instance) - the studied instance and the parameters of experiment
+    2.  solutionfit (list) - the fitness of all current solutions 
+    3.  nsolutionfit (list) - the fitness of all new solutions
+    4.  solutions (list) - a set of current solutions
+    5.  newsolutions (list) - a set of new solutions
+    6.  lcount (list) - counter of the number of iterations that the fitness 
         of solution is not improving
-    6.  capvio (list) - the violation of capacity constraint for each current solution
-    7.  durvio (list) - the violation of duration constraint for each current solution
-    8.  ncapvio (list) - the violation of capacity constraint for each new solution
-    9.  ndurvio (list) - the violation of duration constraint for each new solution
-    10. i (int) - index of current solution
-    11. minGi (float) - the fitness of best neighbor solution of all neighbor
+    7.  capvio (list) - the violation of capacity constraint for each current solution
+    8.  durvio (list) - the violation of duration constraint for each current solution
+    9.  ncapvio (list) - the violation of capacity constraint for each new solution
+    10. ndurvio (list) - the violation of duration constraint for each new solution
+    11. i (int) - index of current solution
+    12. minGi (float) - the fitness of best neighbor solution of all neighbor
         solutions from ith current solution
-    12. locGi (int) - the index of the best neighbor solution in the neighbor 
+    13. locGi (int) - the index of the best neighbor solution in the neighbor 
         solution list
-    13. alpha (float) - coefficient regarding capacity constraint
-    14. beta (float) - coefficient regarding duration constraint   
+    14. alpha (float) - coefficient regarding capacity constraint
+    15. beta (float) - coefficient regarding duration constraint   
 Returns:
     1.  solutions (list) - a set of renewed solutions
     2.  solutionfit (list) - the fitness of all renewed solutions
@@ -359,8 +859,8 @@ Returns:
 '''----------------------------------------------------------------------------
 Exploitation process: when employed bee found a better neighbor solution
 ----------------------------------------------------------------------------'''
-def renewal1(solutionfit, nsolutionfit, solutions, newsolutions, lcount, capvio, durvio, ncapvio, ndurvio):
-    for j in range(Size):
+def renewal1(inst, solutionfit, nsolutionfit, solutions, newsolutions, lcount, capvio, durvio, ncapvio, ndurvio):
+    for j in range(inst.Size):
         if nsolutionfit[j] < solutionfit[j]:
             solutionfit[j] = nsolutionfit[j]
             solutions[j] = newsolutions[j]
@@ -375,7 +875,7 @@ def renewal1(solutionfit, nsolutionfit, solutions, newsolutions, lcount, capvio,
 Exploration process: when onlookers found a better neighbor solution
 ----------------------------------------------------------------------------'''
 'original and semi-enhanced: replace the corresponding current solution with the new solution'
-def renewal2(i, minGi, locGi, solutionfit, solutions, nsolutionfit, newsolutions, lcount, capvio, durvio, ncapvio, ndurvio):
+def renewal2(inst, i, minGi, locGi, solutionfit, solutions, nsolutionfit, newsolutions, lcount, capvio, durvio, ncapvio, ndurvio):
     if minGi < solutionfit[i]:
         solutionfit[i] = minGi
         solutions[i] = newsolutions[locGi]
@@ -388,12 +888,12 @@ def renewal2(i, minGi, locGi, solutionfit, solutions, nsolutionfit, newsolutions
     return solutions, solutionfit, lcount, capvio, durvio    
 
 'enhanced: replace the current solution with maximum limit with the new solution'
-def renewal3(i, minGi, locGi, solutionfit, solutions, nsolutionfit, newsolutions, lcount, capvio, durvio, ncapvio, ndurvio):
+def renewal3(inst, i, minGi, locGi, solutionfit, solutions, nsolutionfit, newsolutions, lcount, capvio, durvio, ncapvio, ndurvio):
     # find current solutions with fitness worser than that of neighbor solution
     if minGi < solutionfit[i]:
         limitGi=[]
         Ggi_id=[]
-        for j in range(Size):
+        for j in range(inst.Size):
             if solutionfit[j]> minGi:
                 limitGi.append(lcount[j])
                 Ggi_id.append(j)
@@ -414,24 +914,26 @@ when no improving neighbor solutions of the current solution have been
 identified during limit successive iterations
 ----------------------------------------------------------------------------'''
 'original: replace the current solution with an initial solution'       
-def renewal4(lcount, solutions, solutionfit, capvio, durvio, alpha, beta):
-    for j in range(Size):
-        if lcount[j] > Limit: # reach Limit
+def renewal4(inst, lcount, solutions, solutionfit, capvio, durvio, alpha, beta):
+    scouts = [j for j in range(inst.Size) if lcount[j] > inst.Limit] # reach Limit
+    if scouts:
+        'all the scouts find new initial solutions at once'
+        temp = initial(inst, len(scouts))
+        tempfit, tempcap, tempdur = fun(inst, temp, alpha, beta)
+        for k, j in enumerate(scouts):
             lcount[j]=0
-            temp = initial(1)
-            solutions[j] = temp[0]
-            solutionfitj, capvioj, durvioj = fun([solutions[j]], alpha, beta)
-            solutionfit[j] = solutionfitj[0]
-            capvio[j] = capvioj[0]
-            durvio[j] = durvioj[0]
+            solutions[j] = temp[k]
+            solutionfit[j] = tempfit[k]
+            capvio[j] = tempcap[k]
+            durvio[j] = tempdur[k]
     return solutions, solutionfit, capvio, durvio, lcount
 
 'semi-enhanced and enhanced: replace the current solution with its neighbor solution'
-def renewal5(lcount, solutions, solutionfit, capvio, durvio, alpha, beta, operators):
-    for j in range(Size):
-        if lcount[j]>Limit: # reach Limit
-            solutions[j]=change(solutions[j], operators)
-            solutionfitj, capvioj, durvioj = fun([solutions[j]], alpha, beta)                       
+def renewal5(inst, lcount, solutions, solutionfit, capvio, durvio, alpha, beta, operators):
+    for j in range(inst.Size):
+        if lcount[j]>inst.Limit: # reach Limit
+            solutions[j]=change(inst, solutions[j], operators)
+            solutionfitj, capvioj, durvioj = fun(inst, [solutions[j]], alpha, beta)                       
             solutionfit[j] = solutionfitj[0]
             capvio[j] = capvioj[0]
             durvio[j] = durvioj[0]
@@ -439,23 +941,428 @@ def renewal5(lcount, solutions, solutionfit, capvio, durvio, alpha, beta, operat
             
     return solutions, solutionfit, capvio, durvio, lcount
             
+'''*************************Local search***************************************
+Aims:
+    improve a solution to a local optimum of its cost function, instead of one
+    random move of a bee, the moves tried pair a customer with the nearest 
+    customers in its candidate list, and each one is evaluated in constant 
+    time by the edges it adds and removes and the routes it touches
+    1.  localSearch - apply the first improving move found among the intra-
+        route 2-opt and Or-opt, and the inter-route relocate and exchange, 
+        until no move improves, a customer whose moves were all tried without
+        improvement is not looked at again (don't-look bit) until a move 
+        changes the customers around it
+    2.  improve - apply the local search to some current solutions, eg. the 
+        best food sources or the scouts, and keep the improved ones
+Inputs:
+    1.  inst (Instance) - the studied instance and the parameters of experiment
+    2.  x (array) - a current solution
+    3.  alpha (float) - coefficient regarding capacity constraint
+    4.  beta (float) - coefficient regarding duration constraint
+    5.  js (list) - the indexes of current solutions improved
+    6.  solutions (list) - a set of current solutions
+    7.  solutionfit (list) - the fitness of all current solutions 
+    8.  lcount (list) - counter of the number of iterations that the fitness 
+        of solution is not improving
+    9.  capvio (list) - the violation of capacity constraint for each current solution
+    10. durvio (list) - the violation of duration constraint for each current solution
+Returns:
+    1.  localSearch - x (array) - the solution at a local optimum, and tried 
+        (int) - the number of moves evaluated
+    2.  improve - solutions, solutionfit, lcount, capvio, durvio as renewal1, 
+        and tried (int) - the number of moves evaluated
+****************************************************************************'''
+def localSearch(inst, x, alpha, beta):
+    D = inst.Distance
+    Q = inst.Capacity
+    T = inst.Duration
+    S = inst.ServiceTime
+    Demand = inst.Demand.tolist()
+    Candidates = inst.Candidates
+    'split the solution into routes, with the travel distance, load and position of each customer'
+    tour = numpy.asarray(x)
+    routes = [r.tolist() for r in numpy.split(tour, numpy.flatnonzero(tour == 0))]
+    routes = [routes[0]] + [r[1:] for r in routes[1:]]
+    dist = []
+    load = []
+    rof = [0]*inst.Dimension # route of each customer
+    pof = [0]*inst.Dimension # position of each customer in its route
+    for r, R in enumerate(routes):
+        p = [0] + R + [0]
+        dist.append(sum([D.item(p[i], p[i+1]) for i in range(len(p)-1)]))
+        load.append(float(sum([Demand[c] for c in R])))
+        for i, c in enumerate(R):
+            rof[c] = r
+            pof[c] = i
+    
+    def cost(d, l, n): # cost of a route by its travel distance, load and customers
+        return d + alpha*max(l - Q, 0) + beta*max(d + n*S - T, 0)
+    
+    def around(R, i): # the vertices before and after position i of a route
+        return R[i-1] if i > 0 else 0, R[i+1] if i+1 < len(R) else 0
+    
+    tried = 0
+    queue = deque(tour[tour != 0].tolist()) # customers to look at
+    active = [False]*inst.Dimension
+    for c in queue:
+        active[c] = True
+    while queue:
+        c = queue.popleft()
+        active[c] = False
+        r = rof[c]
+        R = routes[r]
+        i = pof[c]
+        p, n = around(R, i)
+        old1 = cost(dist[r], load[r], len(R))
+        found = None
+        for d in Candidates[c]:
+            s = rof[d]
+            SR = routes[s]
+            j = pof[d]
+            pd, nd = around(SR, j)
+            if r == s:
+                'intra-route 2-opt, reverse the part between them so that c and d are adjacent'
+                lo, hi = min(i, j), max(i, j)
+                if hi > lo + 1:
+                    a, b = R[lo], R[lo+1]
+                    e, g = R[hi], R[hi+1] if hi+1 < len(R) else 0
+                    delta = D.item(a, e) + D.item(b, g) - D.item(a, b) - D.item(e, g)
+                    tried += 1
+                    if cost(dist[r] + delta, load[r], len(R)) - old1 < -1e-9:
+                        found = ('2opt', lo, hi, delta)
+                        break
+                'intra-route Or-opt, move up to three customers from c on next to d'
+                for L in (1, 2, 3):
+                    if i + L > len(R):
+                        break
+                    e = R[i+L-1]
+                    g = R[i+L] if i+L < len(R) else 0
+                    out = D.item(p, g) - D.item(p, c) - D.item(e, g) # take the customers out
+                    if not i - 1 <= j <= i + L - 1: # after d
+                        delta = out + D.item(d, c) + D.item(e, nd) - D.item(d, nd)
+                        tried += 1
+                        if cost(dist[r] + delta, load[r], len(R)) - old1 < -1e-9:
+                            found = ('oropt', i, L, j, False, delta)
+                            break
+                    if not i <= j <= i + L: # reversed before d
+                        delta = out + D.item(pd, e) + D.item(c, d) - D.item(pd, d)
+                        tried += 1
+                        if cost(dist[r] + delta, load[r], len(R)) - old1 < -1e-9:
+                            found = ('oropt', i, L, j, True, delta)
+                            break
+                if found:
+                    break
+                continue
+            
+            old = old1 + cost(dist[s], load[s], len(SR))
+            dem = Demand[c]
+            'inter-route relocate, insert c after or before d'
+            out = D.item(p, n) - D.item(p, c) - D.item(c, n)
+            new1 = cost(dist[r] + out, load[r] - dem, len(R) - 1)
+            for k, (u, v) in enumerate(((d, nd), (pd, d))):
+                delta = D.item(u, c) + D.item(c, v) - D.item(u, v)
+                tried += 1
+                if new1 + cost(dist[s] + delta, load[s] + dem, len(SR) + 1) - old < -1e-9:
+                    found = ('relocate', r, i, s, j + 1 - k, out, delta)
+                    break
+            if found:
+                break
+            'inter-route exchange, swap c with the customer after or before d'
+            for k, (m, u, v) in enumerate(((nd, d, SR[j+2] if j+2 < len(SR) else 0), 
+                                           (pd, SR[j-2] if j > 1 else 0, d))):
+                if m == 0:
+                    continue
+                delta1 = D.item(p, m) + D.item(m, n) - D.item(p, c) - D.item(c, n)
+                delta2 = D.item(u, c) + D.item(c, v) - D.item(u, m) - D.item(m, v)
+                tried += 1
+                change = Demand[m] - dem
+                if (cost(dist[r] + delta1, load[r] + change, len(R)) + cost(dist[s] + delta2, load[s] - change, len(SR)) 
+                    - old < -1e-9):
+                    found = ('exchange', r, i, s, j + 1 - 2*k, delta1, delta2)
+                    break
+            if found:
+                break
+        
+        if not found:
+            continue # don't look at c till a move changes its neighborhood
+        'apply the move, and look again at the customers whose edges changed'
+        if found[0] == '2opt':
+            _, lo, hi, delta = found
+            touched = [R[lo], R[lo+1], R[hi]] + ([R[hi+1]] if hi+1 < len(R) else [])
+            R[lo+1:hi+1] = R[lo+1:hi+1][::-1]
+            dist[r] += delta
+            changed = [r]
+        elif found[0] == 'oropt':
+            _, i, L, j, reverse, delta = found
+            seg = R[i:i+L]
+            touched = [p, d, pd, nd] + seg + ([R[i+L]] if i+L < len(R) else [])
+            rest = R[:i] + R[i+L:]
+            k = rest.index(d)
+            if reverse:
+                R[:] = rest[:k] + seg[::-1] + rest[k:]
+            else:
+                R[:] = rest[:k+1] + seg + rest[k+1:]
+            dist[r] += delta
+            changed = [r]
+        elif found[0] == 'relocate':
+            _, r, i, s, j, out, delta = found
+            touched = [c, p, n, d, pd, nd]
+            del routes[r][i]
+            routes[s].insert(j, c)
+            dist[r] += out
+            dist[s] += delta
+            load[r] -= Demand[c]
+            load[s] += Demand[c]
+            changed = [r, s]
+        else:
+            _, r, i, s, j, delta1, delta2 = found
+            m = routes[s][j]
+            touched = [c, p, n, m, d] + list(around(routes[s], j))
+            routes[r][i], routes[s][j] = m, c
+            dist[r] += delta1
+            dist[s] += delta2
+            load[r] += Demand[m] - Demand[c]
+            load[s] += Demand[c] - Demand[m]
+            changed = [r, s]
+        for r in changed:
+            for i, v in enumerate(routes[r]):
+                rof[v] = r
+                pof[v] = i
+        for v in touched:
+            if v != 0 and not active[v]:
+                active[v] = True
+                queue.append(v)
+    
+    'join the routes back into one solution'
+    x = []
+    for R in routes:
+        x += R + [0]
+    return numpy.array(x[:-1], dtype=numpy.int32), tried
+
+def improve(inst, js, solutions, solutionfit, lcount, capvio, durvio, alpha, beta):
+    tried = 0
+    for j in js:
+        x, count = localSearch(inst, solutions[j], alpha, beta)
+        tried += count
+        nsolutionfit, ncapvio, ndurvio = fun(inst, [x], alpha, beta)
+        if nsolutionfit[0] < solutionfit[j]: # keep the improved solution
+            solutions[j] = x
+            solutionfit[j] = nsolutionfit[0]
+            capvio[j] = ncapvio[0]
+            durvio[j] = ndurvio[0]
+            lcount[j] = 0
+    return solutions, solutionfit, lcount, capvio, durvio, tried
+
+'''***********************Colony migration*************************************
+Aims:
+    exchange the best food sources between colonies evolving in separate 
+    processes, the colonies form a ring and each one sends its best food 
+    source to the next colony, the received one replaces a current solution
+    as the enhanced renewal3
+Inputs:
+    1.  inst (Instance) - the studied instance and the parameters of experiment
+    2.  conns (tuple) - the connection receiving from the previous colony and 
+        the connection sending to the next colony, followed by what the 
+        colonies share to stop together, see main.agree
+    3.  solutions (list) - a set of current solutions
+    4.  solutionfit (list) - the fitness of all current solutions 
+    5.  lcount (list) - counter of the number of iterations that the fitness 
+        of solution is not improving
+    6.  capvio (list) - the violation of capacity constraint for each current solution
+    7.  durvio (list) - the violation of duration constraint for each current solution
+    8.  alpha (float) - coefficient regarding capacity constraint
+    9.  beta (float) - coefficient regarding duration constraint   
+Returns:
+    the returns of renewal3
+****************************************************************************'''
+def migrate(inst, conns, solutions, solutionfit, lcount, capvio, durvio, alpha, beta):
+    receive, send = conns[0], conns[1]
+    'send the best food source to the next colony and receive one from the previous colony'
+    send.send(solutions[solutionfit.index(min(solutionfit))])
+    migrant = receive.recv()
+    nsolutionfit, ncapvio, ndurvio = fun(inst, [migrant], alpha, beta)
+    
+    'the migrant replaces the current solution with maximum limit among those worse than it'
+    i = solutionfit.index(max(solutionfit))
+    return renewal3(inst, i, nsolutionfit[0], 0, solutionfit, solutions, nsolutionfit, [migrant], 
+                    lcount, capvio, durvio, ncapvio, ndurvio)
+
+'''***********************Convergence history**********************************
+Aims:
+    record the best fitness and the best objective value till each iteration
+    in buffers preallocated for the whole run, the running best is kept so 
+    that each iteration costs constant time, and the records can be thinned 
+    to every step-th iteration
+Inputs:
+    1.  Iterations (int) - the total number of iterations in each run
+    2.  best (float) - the best fitness of initial solutions, the first record
+    3.  step (int) - record every step-th iteration and the last one, default 1
+    4.  log (Log) - optional, the log streaming each record to disk with 
+        alpha, beta and the number of solutions with violations, see 
+        instances.Log
+    5.  alpha, beta, capcount, durcount - the coefficients and the number of 
+        solutions with violations of capacity and duration constraints, 
+        written to the log with the record
+Attributes:
+    1.  infeasible (float) - the best fitness till current iteration
+    2.  infeasisol (array) - a solution with the best fitness
+    3.  feasible (float) - the best objective value till current iteration
+    4.  feasisol (array) - a solution with the best objective value
+    5.  iteration (array) - the iteration of each record, 0 is the initial one
+    6.  infeasibest (array) - the best fitness of each record
+    7.  feasibest (array) - the best objective value of each record
+    8.  evaluations (int) - the number of solutions evaluated in the run
+    9.  itbest, tobest (int, float) - the iteration and the wall-clock time in
+        seconds when the best objective value was found
+    10. wall (float) - the wall-clock time of the run in seconds
+    11. operators (Selector) - the selector of neighborhood operators with 
+        the counters of each operator, None when not kept
+    12. profile (Profiler) - the time and evaluations of the phases of the 
+        run, None when not kept
+    13. reason (string) - why the run stopped, 'iterations', 'time', 'gap', 
+        'stall', 'evaluations' or 'colony' when another colony stopped it
+****************************************************************************'''
+class History:
+    def __init__(self, Iterations, best, step=1, log=None):
+        self.Iterations = Iterations
+        self.step = step
+        self.log = log
+        self.infeasible = best
+        self.infeasisol = []
+        self.feasible = best
+        self.feasisol = []
+        'the stopping of the run'
+        self.evaluations = 0
+        self.itbest = 0
+        self.tobest = 0.0
+        self.wall = 0.0
+        self.reason = ''
+        self.operators = None
+        self.profile = None
+        'buffers of the records, the initial one, every step-th iteration and the last one'
+        self.it = 0 # the number of iterations done
+        self.count = 0 # the number of records
+        self._iteration = numpy.zeros(Iterations//step + 2, dtype=numpy.int64)
+        self._infeasibest = numpy.zeros(Iterations//step + 2)
+        self._feasibest = numpy.zeros(Iterations//step + 2)
+        self.record()
+        
+    def record(self, alpha=None, beta=None, capcount=0, durcount=0):
+        if self.it % self.step == 0 or self.it == self.Iterations:
+            self._iteration[self.count] = self.it
+            self._infeasibest[self.count] = self.infeasible
+            self._feasibest[self.count] = self.feasible
+            self.count += 1
+            if self.log is not None and alpha is not None:
+                self.log.write(self.it, self.infeasible, self.feasible, alpha, beta, capcount, durcount)
+        self.it += 1
+    
+    def finish(self):
+        'record the last iteration when the run stopped between two records'
+        if self._iteration[self.count-1] != self.it - 1:
+            self._iteration[self.count] = self.it - 1
+            self._infeasibest[self.count] = self.infeasible
+            self._feasibest[self.count] = self.feasible
+            self.count += 1
+    
+    @property
+    def iteration(self):
+        return self._iteration[:self.count]
+    
+    @property
+    def infeasibest(self):
+        return self._infeasibest[:self.count]
+    
+    @property
+    def feasibest(self):
+        return self._feasibest[:self.count]
+
+'''***************************Phase profiler***********************************
+Aims:
+    time the phases of each iteration and count the solutions evaluated in 
+    each phase, a lap adds the time since the previous lap to a phase, so 
+    that only one clock reading is taken between two phases, and nothing is
+    done when the profiler is switched off
+    1.  start - begin timing, eg. when the run starts or is resumed
+    2.  lap - add the time since the previous lap to a phase, with the 
+        solutions evaluated in it
+    3.  add - add the times and evaluations of another profiler, eg. of 
+        another colony
+    4.  report - a line of the share of time of each phase for the progress 
+        prints
+    5.  table - the time and evaluations of each phase
+    6.  state, load - the times and evaluations as an array for the 
+        checkpoint and back
+Inputs:
+    1.  enabled (bool) - whether the phases are timed, default False
+    2.  phase (string) - one of the phases, 'employed' the employed bees, 
+        'onlooker' the onlooker bees, 'scout' the scouts of renewal4 and 
+        renewal5, 'migration' the exchange of colonies, 'local' the local 
+        search of the best food sources, 'update' the update of coefficients
+        and history, 'other' the stopping rules, prints and checkpoints
+    3.  evaluations (int) - the number of solutions evaluated in the phase
+Returns:
+    table - [[phase, seconds, share of time, evaluations], ...]
+****************************************************************************'''
+phases = ['employed', 'onlooker', 'scout', 'migration', 'local', 'update', 'other']
+
+class Profiler:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.seconds = numpy.zeros(len(phases))
+        self.evaluations = numpy.zeros(len(phases), dtype=numpy.int64)
+        self.index = {phase: k for k, phase in enumerate(phases)}
+        self.mark = 0.0 # the clock reading of the previous lap
+    
+    def start(self):
+        if self.enabled:
+            self.mark = time.perf_counter()
+    
+    def lap(self, phase, evaluations=0):
+        if self.enabled:
+            now = time.perf_counter()
+            k = self.index[phase]
+            self.seconds[k] += now - self.mark
+            self.evaluations[k] += evaluations
+            self.mark = now
+    
+    def add(self, other):
+        self.seconds += other.seconds
+        self.evaluations += other.evaluations
+    
+    def report(self):
+        total = max(self.seconds.sum(), 1e-12)
+        return 'time of phases: ' + ', '.join(['%s %.1f%%' % (phase, 100*self.seconds[k]/total) 
+                                               for k, phase in enumerate(phases) if self.seconds[k] > 0])
+    
+    def table(self):
+        total = max(self.seconds.sum(), 1e-12)
+        return [[phase, self.seconds[k], self.seconds[k]/total, self.evaluations[k]] for k, phase in enumerate(phases)]
+    
+    def state(self):
+        return numpy.vstack((self.seconds, self.evaluations))
+    
+    def load(self, state):
+        self.seconds = state[0].copy()
+        self.evaluations = state[1].astype(numpy.int64)
+
 '''***********************Iteration update************************************
 Aims:
     1.  find the best solution in each iteration
     2.  update the coefficients alpha and beta
 Inputs:
-    1.  sol (list) - a set of solutions, [[solution1], [solution2], ..., [solutioni]]
-    2.  solfit (list) - the fitness of all solutions
-    3.  alpha (float) - original coefficients, updated according to the number of 
+    1.  inst (Instance) - the studied instance and the parameters of experiment
+    2.  sol (list) - a set of solutions, [[solution1], [solution2], ..., [solutioni]]
+    3.  solfit (list) - the fitness of all solutions
+    4.  alpha (float) - original coefficients, updated according to the number of 
         solutions with violations of capacity constraint
-    4.  beta (float) - original coefficients, updated according to the number of 
+    5.  beta (float) - original coefficients, updated according to the number of 
         solutions with violations of duration constraint
-    5.  infeasibest (list) - the best calculated fitness in each iteration
-    6.  infeasisol (list) - a solution with the best calculated fitness
-    7.  feasibest (list) - the best objective value in each iteration
-    8.  feasisol (list) - a solution with the best objective value
-    9.  capvio (list) - the violation of capacity constraint for each solution
-    10. durvio (list) - the violation of duration constraint for each solution
+    6.  history (History) - the convergence history of the run
+    7.  capvio (list) - the violation of capacity constraint for each solution
+    8.  durvio (list) - the violation of duration constraint for each solution
+    9.  evals (list) - optional, the evaluations of solutions for their 
+        cached objective values
 Returns:
     1.  solfit (list) - the updated fitness of all solutions, recalculated
         with updated coefficients
@@ -463,19 +1370,17 @@ Returns:
         solutions with violations of capacity constraint
     3.  beta (float) - updated coefficients, updated according to the number of 
         solutions with violations of capacity constraint
-    4.  infeasibest (list) - the best fitness till current iteration
-    5.  infeasisol (list) - a solution with the best fitness till current iteration
-    6.  feasibest (list) - the best objective value in each iteration
-    7.  feasisol (list) - a solution with the best objective value
+    4.  history (History) - the convergence history with the best fitness, 
+        objective value and their solutions till current iteration recorded
 ****************************************************************************'''
-def update(sol, solfit, alpha, beta, infeasibest, infeasisol, feasibest, feasisol, capvio, durvio):    
+def update(inst, sol, solfit, alpha, beta, history, capvio, durvio, evals=None):    
     'update gather fit, find the best feasible one'
     totalcount1 = 0 # count the number of solutions with the violation of capacity constraints
     totalcount2 = 0 # count the number of solutions with the violation of duration constraints
     fit = [] # record the fitness of feasible solutions
     dis = [] # record the travel cost of solutions
 
-    for j in range(Size):
+    for j in range(inst.Size):
         count1 = 0 #indicator of violation of capacity, 0 means no violation and 1 means violated
         count2 = 0 #indicator of violation of duration, 0 means no violation and 1 means violated
         
@@ -488,6 +1393,8 @@ def update(sol, solfit, alpha, beta, infeasibest, infeasisol, feasibest, feasiso
         if count1 == 0 and count2 == 0: # when no violation of two constraints
             fit.append(solfit[j]) # fitness
             dis.append(solfit[j]) # objective value
+        elif evals is not None: # when with violation of two constraints, read the cached objective values
+            dis.append(evals[j]['distance'])
         else: # when with violation of two constraints, calculate objective values
             dis.append(solfit[j] - alpha*capvio[j] - beta*durvio[j])
         
@@ -497,87 +1404,93 @@ def update(sol, solfit, alpha, beta, infeasibest, infeasisol, feasibest, feasiso
     
     'adjust alpha and beta'    
     # the number of solutions with violation of the capacity constraints is greater than employed bee size
-    if totalcount1 > int(Size/2): 
-        alpha = alpha*(1+delta)
+    if totalcount1 > int(inst.Size/2): 
+        alpha = alpha*(1+inst.delta)
     else:
-        alpha = alpha/(1+delta)
-    if totalcount2 > int(Size/2):
-        beta = beta*(1+delta)
+        alpha = alpha/(1+inst.delta)
+    if totalcount2 > int(inst.Size/2):
+        beta = beta*(1+inst.delta)
     else:
-        beta = beta/(1+delta)
+        beta = beta/(1+inst.delta)
     
     'find out the best infeasible solution and its fitness till current iteration'
-    if min(solfit) < min(infeasibest): 
-        infeasibest.append(min(solfit))
-        infeasisol = sol[solfit.index(min(solfit))]
-    else:
-        infeasibest.append(min(infeasibest))
+    if min(solfit) < history.infeasible: 
+        history.infeasible = min(solfit)
+        history.infeasisol = sol[solfit.index(min(solfit))]
     
     'find out the best feasible solution and its fitness till current iteration'
-    if fit and min(fit) < min(feasibest): 
-        feasibest.append(min(fit))
-        feasisol = sol[solfit.index(min(fit))]
-    else: # if cannot find the feasible solution
-        feasibest.append(min(feasibest))
+    if fit and min(fit) < history.feasible: 
+        history.feasible = min(fit)
+        history.feasisol = sol[solfit.index(min(fit))]
+    history.record(alpha, beta, totalcount1, totalcount2)
     
     'update the fitness of solutions with new alpha and beta'
-    for j in range(Size):
+    for j in range(inst.Size):
         solfit[j] = dis[j] + alpha*capvio[j] + beta*durvio[j]
     
-    return solfit, alpha, beta, infeasibest, infeasisol, feasibest, feasisol
+    return solfit, alpha, beta, history
 
 '''***********************Result visualization*********************************
 Aims:
     1.  show the coverging process of fitness in each run
     2.  plot the best solution in each run and compare with the best known solution
+    3.  matplotlib is imported by the first call, so that a solver process 
+        which never plots never imports it
 Inputs:
-    1.  feasibest (list) - the best objective value in each iteration
-    2.  infeasibest (list) - the best fitness till current iteration
-    3.  feasisol (list) - a solution with the best objective value
-    4.  Iterations (int) - the total number of iterations in each run
-    5.  fname (string) - the path of folder where the results will be saved
-    6.  algorithm (int) - 1 original 2 semi-enhanced and 3 enhanced
-    7.  itt (int) - the number of current iteration
-    8.  Solroutes (list) - the vehicle trace of best known solution, 
+    1.  inst (Instance) - the studied instance and the parameters of experiment
+    2.  history (History) - the convergence history of the run, with the 
+        best objective value and fitness of each record and the best solution
+    3.  fname (string) - the path of folder where the results will be saved
+    4.  algorithm (int) - 1 original 2 semi-enhanced and 3 enhanced
+    5.  itt (int) - the number of current iteration
+    6.  Solroutes (list) - the vehicle trace of best known solution, 
         [[0, 1, 0], [0, 2, 0], ..., [0, i, 0]]
+    7.  show (bool) - whether the figures are shown and wait to be closed,
+        False only saves them with the non-interactive backend Agg, eg. in a
+        background worker process of a headless server
 Outputs:
     1.  the figure shows the coverging process of fitness and objective value
     2.  the figure compares the best solution from algorithm and the best known one
-    3.  print the information of best solution found in each run, including
-        its overall objective value, trace, travel distance and service time
-        of each vehicle
 ****************************************************************************'''
-def visualize(feasibest, infeasibest, feasisol, Iterations, fname, algorithm, itt, Solroutes):
+def visualize(inst, history, fname, algorithm, itt, show=True):
+    import matplotlib
+    if not show:
+        matplotlib.use('Agg') # no window, only files
+    import matplotlib.pyplot as plt
+    feasisol = history.feasisol
+    infeasibest = history.infeasibest
     'plot the coverging process of fitness and objective value'
     plt.figure(1)
     name = ['Objective value', 'Fitness']        
-    plt.plot(feasibest)
-    plt.plot(infeasibest)
-    plt.axis([0, Iterations, infeasibest[len(infeasibest)-1]-infeasibest[0]/10, infeasibest[0]*1.1])
+    plt.plot(history.iteration, history.feasibest)
+    plt.plot(history.iteration, infeasibest)
+    plt.axis([0, history.iteration[-1], infeasibest[len(infeasibest)-1]-infeasibest[0]/10, infeasibest[0]*1.1])
     plt.xlabel('Iterations', fontproperties='SimHei')
     plt.ylabel('Value', fontproperties='SimHei')                
     plt.legend(name,loc=1)
     plt.grid(True)
     plt.savefig(str(fname) + '\\fitness-algorithm' + str(algorithm) + '-run' + str(itt+1) +'.jpg')
-    plt.show()
+    if show:
+        plt.show()
+    plt.close(1)
     
     'plot the best solution and compare it with the best known solution'
     name = [] 
-    for i in range(Vehicles):
+    for i in range(inst.Vehicles):
         name.append('Route' + str(i+1)) # generate the name for legend
     
-    if feasisol: # when feasible solution exists        
+    if len(feasisol) > 0: # when feasible solution exists        
         'calculate the attributes of the best feasible solution'
-        load,traveldis,stime,trace=calSol(feasisol)        
-        x, y = numpy.hsplit(numpy.array(Coordinates),2)
-        routes = [[] for i in range(Vehicles)]  # routes for plotting purpose
-        result = [[] for i in range(Vehicles)]
+        load,traveldis,stime,trace=calSol(inst, feasisol)        
+        x, y = numpy.hsplit(inst.Coordinates,2)
+        routes = [[] for i in range(inst.Vehicles)]  # routes for plotting purpose
+        result = [[] for i in range(inst.Vehicles)]
         
         'plot the solution in the figure'               
         plt.figure(2)
         plt.subplot(121) # solution from algorithm
-        for j in range(Vehicles):
-            result[j] = Coordinates[trace[j]]
+        for j in range(inst.Vehicles):
+            result[j] = inst.Coordinates[trace[j]]
             xxx, yyy = numpy.hsplit(result[j], 2)
             plt.plot(xxx, yyy, '-*', linewidth = 2) #, linestyle='-', marker='*'
         plt.xlabel('x', fontproperties='SimHei')
@@ -588,8 +1501,8 @@ def visualize(feasibest, infeasibest, feasisol, Iterations, fname, algorithm, it
         plt.axis('equal')
         
         plt.subplot(122) # the best known solution
-        for i in range(Vehicles):
-            routes[i] = Coordinates[Solroutes[i]]
+        for i in range(inst.Vehicles):
+            routes[i] = inst.Coordinates[inst.Solroutes[i]]
             xx, yy = numpy.hsplit(routes[i], 2)
             plt.plot(xx, yy, '--')            
         plt.plot(x[0], y[0],  '.', color='green', markersize=6, label='Start-End')
@@ -601,17 +1514,32 @@ def visualize(feasibest, infeasibest, feasisol, Iterations, fname, algorithm, it
         plt.legend(name,loc=1)
         plt.axis('equal')
         plt.savefig(str(fname) + '\\solutions-algorithm' + str(algorithm) + '-run' + str(itt+1) +'.jpg')
-        plt.show()
-        
+        if show:
+            plt.show()
+        plt.close(2)
+
+'''****************************Result report***********************************
+Aims:
+    print the information of best solution found in each run, including its 
+    overall objective value, trace, travel distance and service time of each 
+    vehicle, without plotting
+Inputs:
+    1.  inst (Instance) - the studied instance and the parameters of experiment
+    2.  history (History) - the convergence history of the run, with the best
+        feasible solution and its objective value
+****************************************************************************'''
+def report(inst, history):
+    if len(history.feasisol) > 0: # when feasible solution exists
+        load,traveldis,stime,trace=calSol(inst, history.feasisol)
         'print the results'
-        print('the objective value of best solution：%s' % (feasibest[len(feasibest)-1]))
-        for car in range(Vehicles): # trace of each vehicle
+        print('the objective value of best solution：%s' % (history.feasible))
+        for car in range(inst.Vehicles): # trace of each vehicle
             print('the trace of vehicle %s：%s' %(car+1,trace[car]))            
-        for car in range(Vehicles): # load of each vehicle
+        for car in range(inst.Vehicles): # load of each vehicle
             print('the load of vehicle %s：%s' %(car+1,load[car]))           
-        for car in range(Vehicles): # travel distance of each vehicle
+        for car in range(inst.Vehicles): # travel distance of each vehicle
             print('the distance of vehicle %s：%s' %(car+1,traveldis[car]))
-        for car in range(Vehicles): # service time of each vehicle
+        for car in range(inst.Vehicles): # service time of each vehicle
             print('the service time of vehicle %s：%s' %(car+1,stime[car]))
     else:
         print('cannot find the feasible solution')
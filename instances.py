@@ -4,8 +4,10 @@ Instances
 Environment: Python 3.7.3, IDE: Spyder, CPU: 3.00GHz
 """
 
+import os
+import json
+import hashlib
 import numpy
-import math
 
 '''***********************Inputs verification**********************************
 Aims:
@@ -43,6 +45,10 @@ Inputs:
         14 classical instances and set 2 is 20 large scale instances
     2.  instances (int) - instance number, for set 1, acceptable values: 1-14, 
         and for set 2, acceptable values: 1-20
+    3.  dtype (numpy dtype) - data type of distance matrix, default 
+        numpy.float64, numpy.float32 halves its memory
+    4.  cache (bool) - whether to read and write the binary cache of parsed 
+        instances, default True
 Returns:
     1.  BestKnown (int) - the objective value of best known solution
     2.  Dimension (int) - the total number of customers and depot
@@ -50,14 +56,45 @@ Returns:
     4.  Duration (int) - the duration constraint
     5.  ServiceTime (int) - the service time for each customer
     6.  Vehicles (int) - the total number of vehicles
-    7.  Coordinates (list) - all the coordinates of customers, 
+    7.  Coordinates (array) - all the coordinates of customers, 
         [[x1, y1], [x2, y2], ..., [xi, yi]]
-    8.  Distance (list) - distances between each pair of customers and depot,
-        [[d1, d2, ..., di], [d1, d2, ..., di], ..., [d1, d2, ..., di]]
-    9.  Demand (list) - demand of each customer, [1, 2, ..., i]
+    8.  Distance (array) - distances between each pair of customers and depot,
+        contiguous matrix in shape of (Dimension, Dimension)
+    9.  Demand (array) - demand of each customer, [0, 1, 2, ..., i]
     10. File (string) - name of instance file
 ****************************************************************************'''
-def dealData(sets, instances):
+def dealData(sets, instances, dtype=numpy.float64, cache=True):
+    return loadInstance(sets, instances, dtype, cache)[:10]
+
+'''**************************Solution load*************************************
+Aims:
+    load the best known solution for result comparation
+Input:
+    1.  sets (int) - number of instance set, acceptable values: 1, 2. set 1 is 
+        14 classical instances and set 2 is 20 large scale instances
+    2.  instances (int) - instance number, for set 1, acceptable values: 1-14, 
+        and for set 2, acceptable values: 1-20
+    3.  cache (bool) - whether to read and write the binary cache of parsed 
+        instances, default True
+Returns:
+    solroutes (list) - the vehicle trace of best known solution, 
+    [[0, 1, 0], [0, 2, 0], ..., [0, i, 0]]
+****************************************************************************'''
+def loadSolution(sets, instances, cache=True):
+    return loadInstance(sets, instances, cache=cache)[10]
+
+'''*************************Instance and solution files parsers*****************
+Aims:
+    parse the text of an instance file and the text of its best known solution
+    file, shared by dealData, loadSolution and results.py through the cache
+Inputs:
+    file (string) - path of .vrp instance file or .sol solution file
+Returns:
+    1.  readInstance - BestKnown, Dimension, Capacity, Duration, ServiceTime,
+        Vehicles, Coordinates, Demand, see dealData
+    2.  readSolution - solroutes, see loadSolution
+****************************************************************************'''
+def readInstance(file):
 
     # pointers for the beginnings of each section of content
     coordinate_begin = -1 # customers coordinate section
@@ -70,14 +107,8 @@ def dealData(sets, instances):
     # for those instances without considering service time, set its service time as 0
     ServiceTime = 0 
 
-    'find out the file name of studied instance' 
-    if sets == 1:        
-        instances = 'CMT' + str(instances) + '.vrp'
-    elif sets == 2:
-        instances = 'Golden_' + str(instances) + '.vrp'
-        
     'read the information of instance'
-    with open('Instances\\'+ instances) as lines:
+    with open(file) as lines:
         for line in lines:
             # BestKnown - the best known solution
             if ('COMMENT' in line):
@@ -143,39 +174,13 @@ def dealData(sets, instances):
                 Demand.append(float(b[1]))
                 demand_begin = demand_begin + 1
     
-    'Calculate distance between each pair of vertices, including customers and depot'
-    Distance=[]
-    for i in range(Dimension):
-        x=[]
-        for j in range(Dimension):
-            p3=Coordinates[i]-Coordinates[j]
-            x.append(math.hypot(p3[0],p3[1]))
-        Distance.append(x)
+    return BestKnown, Dimension, Capacity, Duration, ServiceTime, Vehicles, Coordinates, Demand
 
-    return BestKnown, Dimension, Capacity, Duration, ServiceTime, Vehicles, Coordinates, Distance, Demand, instances
-
-'''**************************Solution load*************************************
-Aims:
-    load the best known solution for result comparation
-Input:
-    1.  sets (int) - number of instance set, acceptable values: 1, 2. set 1 is 
-        14 classical instances and set 2 is 20 large scale instances
-    2.  instances (int) - instance number, for set 1, acceptable values: 1-14, 
-        and for set 2, acceptable values: 1-20
-Returns:
-    solroutes (list) - the vehicle trace of best known solution, 
-    [[0, 1, 0], [0, 2, 0], ..., [0, i, 0]]
-****************************************************************************'''
-def loadSolution(sets, instances):
-
-    if sets == 1:        
-        solution = 'CMT' + str(instances) + '.sol'
-    elif sets == 2:
-        solution = 'Golden_' + str(instances) + '.sol'
+def readSolution(file):
 
     linenumber = 0
     Vehicles = 0
-    with open('Instances\\' + solution) as lines:
+    with open(file) as lines:
         for line in lines:
             linenumber += 1
             if linenumber == 2:
@@ -189,6 +194,174 @@ def loadSolution(sets, instances):
                 
     return solroutes
 
+'''*************************Distance calculation********************************
+Aims:
+    calculate distance between each pair of vertices, including customers and 
+    depot, in one broadcasted operation
+Inputs:
+    1.  Coordinates (array) - all the coordinates of customers and depot
+    2.  dtype (numpy dtype) - data type of distance matrix
+Returns:
+    Distance (array) - contiguous distance matrix in shape of (Dimension, Dimension)
+****************************************************************************'''
+def calDistance(Coordinates, dtype=numpy.float64):
+    # broadcast coordinates against themselves, the difference of each pair in shape of (Dimension, Dimension, 2)
+    p3 = Coordinates[:, numpy.newaxis, :] - Coordinates[numpy.newaxis, :, :]
+    return numpy.ascontiguousarray(numpy.hypot(p3[:, :, 0], p3[:, :, 1]), dtype=dtype)
+
+'''**************************Candidate lists***********************************
+Aims:
+    find the k nearest customers of each customer and the depot once by a 
+    partial sort of the distance matrix, so that the neighborhood operators 
+    pair a customer with one close to it instead of one picked uniformly
+Inputs:
+    1.  Distance (array) - distances between each pair of customers and depot
+    2.  K (int) - number of nearest customers kept for each vertex
+Returns:
+    Candidates (list) - the K nearest customers of each vertex ordered by 
+    distance, neither the vertex itself nor the depot is included
+****************************************************************************'''
+def calCandidates(Distance, K):
+    n = len(Distance)
+    K = min(K, n - 2)
+    D = numpy.array(Distance, dtype=numpy.float64)
+    D[:, 0] = numpy.inf # the depot is never a candidate
+    numpy.fill_diagonal(D, numpy.inf)
+    'the K smallest of each row unordered, then ordered by distance'
+    near = numpy.argpartition(D, K-1, axis=1)[:, :K]
+    order = numpy.argsort(numpy.take_along_axis(D, near, axis=1), axis=1)
+    return numpy.take_along_axis(near, order, axis=1).tolist()
+
+'''*************************Instances cache************************************
+Aims:
+    1.  load an instance, its best known solution and distance matrix from the 
+        binary cache in Instances/cache, the distance matrix is memory-mapped 
+        so later loads are near-instant and zero-copy
+    2.  parse the text files and write the cache when it is missing, the cache 
+        is keyed on the hash of the .vrp and .sol files so editing either of 
+        them invalidates it
+Inputs:
+    1.  sets (int) - number of instance set, acceptable values: 1, 2
+    2.  instances (int) - instance number, 1-14 for set 1, 1-20 for set 2
+    3.  dtype (numpy dtype) - data type of distance matrix, default numpy.float64
+    4.  cache (bool) - whether to read and write the cache, default True
+Returns:
+    the returns of dealData followed by solroutes of loadSolution
+Outputs:
+    Instances/cache/<name>-<hash>.npz - header constants, coordinates, demand 
+    and best known routes, and Instances/cache/<name>-<hash>-<dtype>.npy - 
+    distance matrix
+****************************************************************************'''
+folder = 'Instances' # where the all instances and their solutions stored
+cachefolder = os.path.join(folder, 'cache') # where the parsed instances are cached
+
+def loadInstance(sets, instances, dtype=numpy.float64, cache=True):
+    'find out the file name of studied instance' 
+    if sets == 1:        
+        name = 'CMT' + str(instances)
+    elif sets == 2:
+        name = 'Golden_' + str(instances)
+    File = name + '.vrp'
+    vrp = os.path.join(folder, File)
+    sol = os.path.join(folder, name + '.sol')
+
+    'key the cache on the contents of the instance and solution files'
+    digest = hashlib.sha1()
+    for path in [vrp, sol]:
+        with open(path, 'rb') as content:
+            digest.update(content.read())
+    key = os.path.join(cachefolder, name + '-' + digest.hexdigest()[:16])
+    datafile = key + '.npz'
+    distfile = key + '-' + numpy.dtype(dtype).name + '.npy'
+
+    if cache and os.path.exists(datafile) and os.path.exists(distfile):
+        'read the cache, the distance matrix is mapped instead of read'
+        with numpy.load(datafile) as data:
+            header = data['header']
+            Coordinates = data['coordinates']
+            Demand = data['demand']
+            routes = data['routes']
+            offsets = data['offsets']
+        BestKnown = float(header[0])
+        Dimension, Capacity, Duration, ServiceTime, Vehicles = [int(h) for h in header[1:]]
+        Distance = numpy.load(distfile, mmap_mode='r').view(numpy.ndarray)
+        solroutes = [route.tolist() for route in numpy.split(routes, offsets)]
+    else:
+        'parse the text files and calculate the distance matrix'
+        BestKnown, Dimension, Capacity, Duration, ServiceTime, Vehicles, Coordinates, Demand = readInstance(vrp)
+        Demand = numpy.array(Demand)
+        solroutes = readSolution(sol)
+        Distance = calDistance(Coordinates, dtype)
+        if cache:
+            'write the cache, through temporary files so a concurrent reader never sees a partial file'
+            os.makedirs(cachefolder, exist_ok=True)
+            header = numpy.array([BestKnown, Dimension, Capacity, Duration, ServiceTime, Vehicles])
+            routes = numpy.concatenate([numpy.array(route, dtype=numpy.int32) for route in solroutes])
+            offsets = numpy.cumsum([len(route) for route in solroutes])[:-1]
+            temp = datafile + '.' + str(os.getpid()) + '.tmp'
+            with open(temp, 'wb') as content:
+                numpy.savez(content, header=header, coordinates=Coordinates, demand=Demand, 
+                            routes=routes, offsets=offsets)
+            os.replace(temp, datafile)
+            temp = distfile + '.' + str(os.getpid()) + '.tmp'
+            with open(temp, 'wb') as content:
+                numpy.save(content, Distance)
+            os.replace(temp, distfile)
+
+    return BestKnown, Dimension, Capacity, Duration, ServiceTime, Vehicles, Coordinates, Distance, Demand, File, solroutes
+
+'''*************************Instance container*********************************
+Aims:
+    hold the data of a studied instance together with the parameters of the 
+    experiment, so that the functions of ABC algorithm run against it instead
+    of module globals and several instances can be solved in one process
+Inputs:
+    1.  sets (int) - number of instance set, acceptable values: 1, 2. set 1 is 
+        14 classical instances and set 2 is 20 large scale instances
+    2.  instances (int) - instance number, for set 1, acceptable values: 1-14, 
+        and for set 2, acceptable values: 1-20
+    3.  Size (int) - size of employed bee, half of colony size, default 25
+    4.  Limit (int) - the consecutive limit iterations before a food source 
+        is abandoned, default 50n, n is customers size in instance
+    5.  delta (float) - coefficient delta of cost function, default 0.001
+    6.  dtype (numpy dtype) - data type of distance matrix, default numpy.float64
+    7.  K (int) - size of the candidate list of each customer for the granular
+        operators and the local search, default 0 without candidate lists
+    8.  Granular (bool) - whether the operators pick their second customer 
+        from the candidate lists, default False
+    9.  Seeding (string) - construction of initial solutions, 'random' to the
+        nearest vehicle, 'sweep' or 'savings', see functions.initial, 
+        'savings' needs the candidate lists, K > 0
+Attributes:
+    1.  BestKnown, Dimension, Capacity, Duration, ServiceTime, Vehicles, 
+        Coordinates, Distance, Demand, File - the returns of dealData
+    2.  Solroutes (list) - the vehicle trace of best known solution, the 
+        return of loadSolution
+    3.  Size, Limit, delta, K, Granular, Seeding - the parameters of the 
+        experiment
+    4.  Candidates (list) - the K nearest customers of each vertex, the 
+        return of calCandidates, None when K is 0
+****************************************************************************'''
+class Instance:
+    def __init__(self, sets, instances, Size=25, Limit=None, delta=0.001, dtype=numpy.float64, K=0, Granular=False, Seeding='random'):
+        self.sets = sets
+        self.instances = instances
+        'load contents of the studied instance and its best known solution'
+        (self.BestKnown, self.Dimension, self.Capacity, self.Duration, self.ServiceTime, self.Vehicles, 
+         self.Coordinates, self.Distance, self.Demand, self.File, self.Solroutes) = loadInstance(sets, instances, dtype)
+        'parameters of the experiment'
+        self.Size = Size # the number of food sources
+        if Limit is None: # the consecutive limit iterations before a food source is abandoned
+            Limit = 50*(self.Dimension-1)
+        self.Limit = Limit
+        self.delta = delta # coefficient of cost function, constant delta
+        self.K = K # size of candidate lists
+        self.Granular = Granular and K > 0 # the operators pick from candidate lists, otherwise uniformly
+        self.Seeding = Seeding # construction of initial solutions
+        if Seeding == 'savings' and K <= 0:
+            raise ValueError("Seeding 'savings' merges each customer with its candidate list, K must be positive")
+        self.Candidates = calCandidates(self.Distance, K) if K > 0 else None
+
 '''**************************Results savers************************************
 Aims:
     save all the results for visualization
@@ -196,16 +369,38 @@ Input:
     1.  name (string) - folder path for saving results
     2.  itt (int) - the number of current run
     3.  algorithm (int) - current algorithm
-    5.  infeasibest (list) - the best calculated fitness in each iteration
-    6.  infeasisol (list) - a solution with the best calculated fitness
-    7.  feasibest (list) - the best objective value in each iteration
-    8.  feasisol (list) - a solution with the best objective value
+    5.  infeasibest (array) - the best calculated fitness in each iteration
+    6.  infeasisol (array) - a solution with the best calculated fitness
+    7.  feasibest (array) - the best objective value in each iteration
+    8.  feasisol (array) - a solution with the best objective value
+    9.  iteration (array) - optional, the iteration of each value in feasibest
+        when the history was recorded every few iterations
+    10. operators (array) - optional, the counters of each neighborhood 
+        operator, see functions.Selector.table
+    11. profile (list) - optional, the time and evaluations of each phase of
+        the run, see functions.Profiler.table
 Outputs:
-    files saving the coverging process of objective value and the best solution
+    files saving the coverging process of objective value and the best solution,
+    the counters of operators and the profile of the run, the objective values,
+    iterations and solution are also appended to the results store of the 
+    experiment, see Store
 ****************************************************************************'''
-def saveResult(name, itt, algorithm, infeasibest, infeasisol, feasibest, feasisol):
-    numpy.save(str(name) + '\\feasible_fitness-algorithm' + str(algorithm) + '-run' + str(itt+1) + '.npy', numpy.array(feasibest))
-    numpy.save(str(name) + '\\feasible_solution-algorithm' + str(algorithm) + '-run' + str(itt+1) + '.npy', numpy.array(feasisol))
+def saveResult(name, itt, algorithm, infeasibest, infeasisol, feasibest, feasisol, iteration=None, operators=None, profile=None):
+    numpy.save(str(name) + '\\feasible_fitness-algorithm' + str(algorithm) + '-run' + str(itt+1) + '.npy', numpy.asarray(feasibest))
+    numpy.save(str(name) + '\\feasible_solution-algorithm' + str(algorithm) + '-run' + str(itt+1) + '.npy', numpy.asarray(feasisol))
+    if iteration is not None:
+        numpy.save(str(name) + '\\feasible_iteration-algorithm' + str(algorithm) + '-run' + str(itt+1) + '.npy', numpy.asarray(iteration))
+    if operators is not None:
+        numpy.savetxt(str(name) + '\\operators-algorithm' + str(algorithm) + '-run' + str(itt+1) + '.csv', operators, 
+                      fmt=['%d', '%d', '%d', '%.6f', '%.6f', '%.6f'], delimiter=',', comments='', 
+                      header='operator,applications,improvements,meandelta,time,probability')
+    if profile is not None:
+        numpy.savetxt(str(name) + '\\profile-algorithm' + str(algorithm) + '-run' + str(itt+1) + '.csv', 
+                      numpy.array(profile, dtype=str), fmt='%s', delimiter=',', comments='', 
+                      header='phase,seconds,share,evaluations')
+    store = Store(name)
+    store.add(algorithm, itt+1, feasibest, iteration, feasisol)
+    store.save()
 
 '''***********************Running time calculation*****************************
 Aims:
@@ -216,14 +411,192 @@ Input:
     3.  name (string) - folder path for saving results
     4.  iterations (int) - total number of iterations
     5.  size (int) - solution size, equals the size of employed bees
+    6.  stops (list) - optional, how each run stopped, [run, iterations done,
+        reason, evaluations, iteration of best, time to best, wall-clock time]
 Outputs:
     1.  print the average time of each run
     2.  save the time records when each run ends
+    3.  save how each run stopped next to the time records
+    4.  keep the time records and stops in the results store of the experiment
 ****************************************************************************'''
-def Timer(timers, algorithm, name, iterations, size):
+def Timer(timers, algorithm, name, iterations, size, stops=None):
     if len(timers) == 1:
         print('cannot calculate with only one run')
     else:
         count = len(timers) - 1
         print('average running time in minutes for algorithm %s: %f' % (algorithm, (timers[len(timers)-1]-timers[0])/count/60))    
     numpy.savetxt(str(name) + '\\timers-algorithm' + str(algorithm) + '-size' + str(size) + '-iterations' + str(iterations) + '.csv', numpy.array(timers))
+    if stops is not None:
+        numpy.savetxt(str(name) + '\\stops-algorithm' + str(algorithm) + '-size' + str(size) + '-iterations' + str(iterations) + '.csv', 
+                      numpy.array(stops, dtype=str), fmt='%s', delimiter=',', comments='', 
+                      header='run,iterations,reason,evaluations,itbest,tobest,wall')
+    store = Store(name)
+    store.timers(algorithm, size, iterations, timers, stops)
+    store.save()
+
+'''***************************Results store************************************
+Aims:
+    keep all results of an experiment in one indexed store instead of a file
+    for each run, so that reading an experiment does not walk and load 
+    hundreds of small files
+    1.  the arrays of all runs are appended to one binary file per column, 
+        the objective values, their iterations and the best solutions, which
+        are memory mapped when read, so only the queried runs are loaded
+    2.  a manifest indexes each run by algorithm and run, with the offset and
+        length of its arrays in each column and its minimum objective value,
+        and keeps the time records of each algorithm, so that a summary of 
+        the experiment reads the manifest only
+    3.  the manifest is replaced atomically, a run saved again replaces its 
+        entry, eg. when an experiment is resumed
+Input:
+    1.  name (string) - folder path of the experiment
+    2.  algorithm (int) - current algorithm
+    3.  run (int) - the number of run, start from 1
+    4.  fitness (array) - the best objective value in each record
+    5.  iteration (array) - optional, the iteration of each record
+    6.  solution (array) - the best feasible solution, empty when none
+    7.  size, iterations, timers, stops - see Timer
+Outputs:
+    1.  store.json - the manifest, {'columns': storecolumns, 'runs': [entry of
+        each run], 'timers': [entry of each algorithm]}
+    2.  store-<column>.bin - the column files of raw values, in the data type
+        given by storecolumns
+    3.  runs - entries (list) - the entries of runs, of one algorithm if given
+    4.  read - values (array) - the read-only values of a run in a column
+****************************************************************************'''
+storecolumns = {'fitness': 'float64', 'iteration': 'int64', 'solution': 'int32'}
+
+class Store:
+    def __init__(self, name):
+        self.name = name
+        self.file = str(name) + '\\store.json'
+        self.manifest = {'columns': storecolumns, 'runs': [], 'timers': []}
+        if os.path.exists(self.file):
+            with open(self.file) as content:
+                self.manifest = json.load(content)
+        self.maps = {} # memory maps of the columns, opened by the first read
+    
+    def column(self, key):
+        return str(self.name) + '\\store-' + key + '.bin'
+    
+    def add(self, algorithm, run, fitness, iteration=None, solution=()):
+        'append the arrays of a run to the columns and index them'
+        fitness = numpy.asarray(fitness, dtype=storecolumns['fitness'])
+        if iteration is None: # recorded at each iteration
+            iteration = numpy.arange(len(fitness))
+        entry = {'algorithm': int(algorithm), 'run': int(run), 
+                 'minfitness': float(fitness.min()) if len(fitness) else None}
+        for key, array in (('fitness', fitness), ('iteration', iteration), ('solution', solution)):
+            array = numpy.asarray(array, dtype=storecolumns[key]).ravel()
+            file = self.column(key)
+            offset = os.path.getsize(file)//array.itemsize if os.path.exists(file) else 0
+            with open(file, 'ab') as content:
+                content.write(array.tobytes())
+            entry[key] = [offset, len(array)]
+        self.manifest['runs'] = [e for e in self.manifest['runs'] if (e['algorithm'], e['run']) != (entry['algorithm'], entry['run'])]
+        self.manifest['runs'].append(entry)
+        self.maps = {} # the columns have grown
+    
+    def timers(self, algorithm, size, iterations, timers, stops=None):
+        'the time records of an algorithm, replacing the ones saved before'
+        entry = {'algorithm': int(algorithm), 'size': int(size), 'iterations': int(iterations), 
+                 'timers': [float(t) for t in timers], 
+                 'stops': numpy.array(stops, dtype=str).tolist() if stops is not None else None}
+        self.manifest['timers'] = [e for e in self.manifest['timers'] if e['algorithm'] != entry['algorithm']]
+        self.manifest['timers'].append(entry)
+    
+    def save(self):
+        temp = self.file + '.' + str(os.getpid()) + '.tmp'
+        with open(temp, 'w') as content:
+            json.dump(self.manifest, content)
+        os.replace(temp, self.file)
+    
+    def runs(self, algorithm=None):
+        return [e for e in self.manifest['runs'] if algorithm is None or e['algorithm'] == algorithm]
+    
+    def read(self, key, entry):
+        offset, length = entry[key]
+        if length == 0:
+            return numpy.zeros(0, dtype=self.manifest['columns'][key])
+        if key not in self.maps:
+            self.maps[key] = numpy.memmap(self.column(key), dtype=self.manifest['columns'][key], mode='r')
+        return self.maps[key][offset:offset+length]
+
+'''***********************Checkpoint of run************************************
+Aims:
+    save the search state of a run to disk and load it again, so that an 
+    interrupted run continues where it stopped, the file is replaced 
+    atomically and never left half written
+Input:
+    1.  name (string) - folder path for saving results
+    2.  itt (int) - the number of current run
+    3.  algorithm (int) - current algorithm
+    4.  file (string) - path of the checkpoint file
+    5.  state (dict) - the search state as arrays, see main.run
+Outputs:
+    1.  checkpointFile - file (string) - path of the checkpoint of the run
+    2.  saveCheckpoint - the compressed checkpoint file
+    3.  loadCheckpoint - state (dict) - the search state in the checkpoint
+****************************************************************************'''
+def checkpointFile(name, itt, algorithm):
+    return str(name) + '\\checkpoint-algorithm' + str(algorithm) + '-run' + str(itt+1) + '.npz'
+
+def saveCheckpoint(file, state):
+    temp = file + '.' + str(os.getpid()) + '.tmp'
+    with open(temp, 'wb') as content:
+        numpy.savez_compressed(content, **state)
+    os.replace(temp, file)
+
+def loadCheckpoint(file):
+    with numpy.load(file) as content:
+        state = {key: content[key] for key in content.files}
+    return state
+
+'''***********************Convergence log**************************************
+Aims:
+    stream the convergence of a run to disk while it is going, the records 
+    are kept in a buffer of fixed size and appended to a binary log file 
+    each time the buffer is full, so that a crashed run keeps all but the 
+    last chunk and the history does not have to sit in memory
+Input:
+    1.  name (string) - folder path for saving results
+    2.  itt (int) - the number of current run
+    3.  algorithm (int) - current algorithm
+    4.  chunk (int) - the number of records written at once, default 1000
+    5.  island (int) - optional, the number of colony when the run has islands
+    6.  file (string) - path of a log file to read
+Outputs:
+    1.  Log - log file of float64 records, the columns are logcolumns
+    2.  readLog - log (array) - the complete records in a log file, one row 
+        for each, also of a run still going
+****************************************************************************'''
+logcolumns = ['iteration', 'fitness', 'objective', 'alpha', 'beta', 'capcount', 'durcount']
+
+class Log:
+    def __init__(self, name, itt, algorithm, chunk=1000, island=None):
+        self.name = name
+        self.itt = itt
+        self.algorithm = algorithm
+        self.chunk = chunk
+        self.file = str(name) + '\\log-algorithm' + str(algorithm) + '-run' + str(itt+1)
+        if island is not None:
+            self.file = self.file + '-island' + str(island)
+        self.file = self.file + '.bin'
+        self.buffer = numpy.zeros((chunk, len(logcolumns))) # records not written yet
+        self.count = 0 # the number of records in buffer
+        
+    def write(self, *record):
+        self.buffer[self.count] = record
+        self.count += 1
+        if self.count == self.chunk:
+            self.flush()
+    
+    def flush(self):
+        'append the records in buffer to the log file'
+        with open(self.file, 'ab') as file:
+            file.write(self.buffer[:self.count].tobytes())
+        self.count = 0
+
+def readLog(file):
+    log = numpy.fromfile(file)
+    return log[:len(log)//len(logcolumns)*len(logcolumns)].reshape(-1, len(logcolumns)) # drop the record being written
@@ -0,0 +1,160 @@
+"""
+Kernel benchmarks
+
+Environment: Python 3.7.3, IDE: Spyder, CPU: 3.00GHz
+"""
+
+import os
+import sys
+import json
+import time
+import itertools
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from instances import Instance
+import functions as f
+import main as m
+
+'''***************************Kernel benchmarks********************************
+Aims:
+    1.  time the kernels of the ABC algorithm in functions.py one by one,
+        calSol, fun, change of each operator, choose, generateGi, initial
+        and update, and the kernels of each iteration working on the 
+        evaluations of solutions, evaluate, calDelta and changeDelta of each
+        operator, neighbors of all food sources, build, refresh and 
+        localSearch, on a small, a medium and a large instance, so that a
+        rework of a kernel is measured in isolation
+    2.  measure the memory allocated by one call of each kernel
+    3.  store the results as baseline, or compare with the stored baseline
+        and fail when a kernel is slower or allocates more than the threshold
+Inputs:
+    1.  instances (list) - (set, instance number) of the studied instances,
+        CMT1, CMT5 and Golden_12
+    2.  Calls (int) - calls of a kernel in one timing
+    3.  Heavy (dict) - calls in one timing and traced calls of the kernels 
+        taking milliseconds, instead of Calls and Traced
+    4.  Repeats (int) - timings of a kernel, the fastest one is kept
+    5.  Traced (int) - calls of a kernel with tracing of memory allocation
+    6.  Threshold (float) - the relative increase of time or memory of a
+        kernel that fails, eg. 0.2 means 20% slower
+    7.  Baseline (string) - the JSON file of stored baseline, the command
+        line argument --save stores the results as the baseline
+Outputs:
+    1.  kernels - records (DataFrame) - for each instance and kernel, the time
+        in nanoseconds per call and the peak memory allocated in bytes per
+        call, traced by tracemalloc
+    2.  compare - records with the baseline and whether each kernel passed
+    3.  print the records and exit with 1 when any kernel failed
+****************************************************************************'''
+
+'''----------------------------------------------------------------------------
+Please set the inputs of the benchmark
+----------------------------------------------------------------------------'''
+instances = [(1, 1), (1, 5), (2, 12)] # CMT1, CMT5 and Golden_12, small, medium and large instance
+Calls = 200 # calls of a kernel in one timing
+Heavy = {'localSearch': 5} # calls in one timing and traced calls of the kernels taking milliseconds
+Repeats = 5 # timings of a kernel, the fastest kept
+Traced = 20 # calls of a kernel with tracing of memory allocation
+Threshold = 0.2 # relative increase of time or memory of a kernel that fails
+Baseline = 'Results\\kernels-baseline.json' # stored baseline
+
+def kernels(inst):
+    'the kernels with their inputs, made once from fixed seeds'
+    f.rng.seed(1)
+    solutions = f.initial(inst, inst.Size)
+    solutionfit, capvio, durvio = f.fun(inst, solutions, m.initalpha, m.initbeta)
+    x = solutions[0]
+    nsolutionfit = f.rng.generator.random(inst.Size).tolist()
+    newsolutions, sourceID = f.choose(inst, solutionfit, solutions)
+
+    history = f.History(Calls*Repeats + Traced, min(solutionfit)) # buffers for all calls of update
+    def update():
+        f.update(inst, solutions, solutionfit[:], m.initalpha, m.initbeta, history, capvio, durvio)
+
+    calls = {'calSol': lambda: f.calSol(inst, x),
+             'fun': lambda: f.fun(inst, solutions, m.initalpha, m.initbeta),
+             'choose': lambda: f.choose(inst, solutionfit, solutions),
+             'generateGi': lambda: f.generateGi(nsolutionfit, sourceID),
+             'initial': lambda: f.initial(inst, inst.Size),
+             'update': update}
+    for op in range(1, 8):
+        calls['change' + str(op)] = (lambda op: lambda: f.change(inst, x, [op]))(op)
+    
+    'the evaluations of the food sources, and moves from them made once, used in turn by the calls'
+    evals = f.refresh(inst, solutions, [None]*inst.Size)
+    ev = evals[0]
+    selector = f.Selector(m.operators)
+    def moves(operators):
+        return itertools.cycle([f.move(inst, ev['tour'], operators, ev['pos']) for i in range(100)]).__next__
+    
+    'half of the food sources replaced by the neighbors built for them, and one by a scout evaluated again'
+    built = [f.build(inst, evals[j], f.move(inst, evals[j]['tour'], m.operators, evals[j]['pos'])) for j in range(inst.Size)]
+    replaced = [built[j]['x'] if j % 2 == 0 else solutions[j] for j in range(inst.Size)]
+    replaced[1] = solutions[1].copy()
+    
+    nextmove = moves(m.operators)
+    calls['evaluate'] = lambda: f.evaluate(inst, x)
+    calls['neighbors'] = lambda: f.neighbors(inst, evals, selector, m.initalpha, m.initbeta)
+    calls['build'] = lambda: f.build(inst, ev, nextmove())
+    calls['refresh'] = lambda: f.refresh(inst, replaced, evals[:], built)
+    calls['localSearch'] = lambda: f.localSearch(inst, x, m.initalpha, m.initbeta)
+    for op in range(1, 8):
+        calls['calDelta' + str(op)] = (lambda nextmove: lambda: f.calDelta(inst, ev, nextmove()))(moves([op]))
+        calls['changeDelta' + str(op)] = (lambda op: lambda: f.changeDelta(inst, ev, [op]))(op)
+    return calls
+
+def bench():
+    records = []
+    for sets, number in instances:
+        inst = Instance(sets, number, m.Size, delta=m.delta, dtype=m.dtype, K=m.Neighbors, Granular=m.Granular,
+                        Seeding=m.Seeding)
+        for name, call in kernels(inst).items():
+            calls = Heavy.get(name, Calls)
+            traced = Heavy.get(name, Traced)
+            'the fastest of the timings'
+            best = np.inf
+            for r in range(Repeats):
+                start = time.perf_counter_ns()
+                for i in range(calls):
+                    call()
+                best = min(best, (time.perf_counter_ns() - start)/calls)
+
+            'the peak of memory allocated during one call'
+            peak = 0
+            for i in range(traced):
+                tracemalloc.start()
+                call()
+                peak += tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            records.append({'instance': inst.File, 'kernel': name, 'nspercall': best, 'bytespercall': peak/traced})
+    return pd.DataFrame(records)
+
+def compare(records, baseline):
+    both = records.merge(baseline, on=['instance', 'kernel'], how='left', suffixes=('', '_baseline'))
+    both['passed'] = ~((both['nspercall'] > both['nspercall_baseline']*(1 + Threshold)) |
+                       (both['bytespercall'] > both['bytespercall_baseline']*(1 + Threshold)))
+    return both
+
+if __name__ == '__main__':
+    records = bench()
+    if '--save' in sys.argv[1:]:
+        'store the results as the baseline'
+        os.makedirs(os.path.dirname(Baseline) or '.', exist_ok=True)
+        with open(Baseline, 'w') as file:
+            json.dump(json.loads(records.to_json(orient='records')), file, indent=1)
+        print(records.to_string(index=False))
+        print('baseline saved as %s' % Baseline)
+    elif os.path.exists(Baseline):
+        with open(Baseline) as file:
+            baseline = pd.DataFrame(json.load(file))
+        records = compare(records, baseline)
+        print(records.to_string(index=False))
+        if not records['passed'].all():
+            print('%d kernels are slower or allocate more than the baseline by %s' % ((~records['passed']).sum(), Threshold))
+            sys.exit(1)
+        print('all kernels passed against %s' % Baseline)
+    else:
+        print(records.to_string(index=False))
+        print('no baseline, store one with python kernels.py --save')
@@ -5,10 +5,14 @@ Environment: Python 3.7.3, IDE: Spyder, CPU: 3.00GHz
 """
 
 import os
+import sys
 import time
 import numpy as np
+import multiprocessing
+import multiprocessing.connection
+from concurrent.futures import ProcessPoolExecutor
 
-from instances import verifyPara, dealData, loadSolution, saveResult, Timer
+from instances import verifyPara, Instance, saveResult, Timer, Log, checkpointFile, saveCheckpoint, loadCheckpoint
 import functions as f
 
 '''******************************MAIN******************************************
@@ -30,6 +34,65 @@ Inputs:
     8.  initalpha (float) - coefficient alpha of cost function, default 0.1
     9.  initbeta (float) - coefficient beta of cost function, default 0.1
     10. delta (float) - coefficient delta of cost function, default 0.001 
+    11. dtype (numpy dtype) - data type of distance matrix, default np.float64,
+        np.float32 halves its memory on large instances
+    12. Workers (int) - number of processes running the runs of all algorithms
+        in parallel, default 1 runs them one after another
+    13. Seed (int) - seed of the experiment, each run draws its own stream of 
+        random numbers from it, default None for an unpredictable experiment
+    14. Islands (int) - number of colonies in each run, evolving in separate 
+        processes and exchanging their best food sources, default 1
+    15. Migration (int) - iterations between two exchanges of the colonies, 
+        default 100
+    16. Step (int) - record the convergence history every Step iterations, 
+        default 1 records each iteration
+    17. Chunk (int) - records of the convergence log written to disk at once
+        while the run is going, default 1000, 0 for no log
+    18. Checkpoint (int) - iterations between two checkpoints of the search 
+        state of each run, default 10000, 0 for no checkpoint. run 
+        python main.py --resume <folder of results> to continue an 
+        interrupted experiment from its checkpoints
+    19. TimeLimit (float) - seconds of each run, default 0 for no limit
+    20. Clock (string) - the clock of TimeLimit, 'wall' for wall-clock time 
+        and 'cpu' for CPU time, default 'wall'
+    21. Gap (float) - stop a run when its best objective value is within Gap 
+        above the best known solution, eg. 0.01, default None for never
+    22. Stall (int) - stop a run after Stall iterations without improving the
+        best objective value, default 0 for never
+    23. Evaluations (int) - stop a run after Evaluations solutions have been
+        evaluated, default 0 for no limit, the colonies of islands share the
+        budget, their evaluations are summed at each migration
+    24. Granular (bool) - whether the swaps, insertions and reversing pair a 
+        customer with one in its candidate list, default False for uniform 
+        picks
+    25. Neighbors (int) - size of the candidate list of nearest customers of
+        each customer, for the granular operators and the local search
+    26. LocalSearch (int) - iterations between two local searches of the best
+        food sources, which also run at the end of the run, default 0 for none,
+        the local search needs the candidate lists of Neighbors > 0
+    27. LocalBest (int) - number of the best food sources improved by each 
+        local search
+    28. LocalScouts (bool) - whether the solutions replaced by renewal4 or 
+        renewal5 are improved by the local search, default False
+    29. Seeding (string) - construction of initial solutions and the scouts 
+        of renewal4, 'random' assigns the customers in random order to the 
+        nearest vehicle, 'sweep' and 'savings' the sweep and savings methods,
+        'savings' needs the candidate lists of Neighbors > 0
+    30. Adaptive (bool) - whether the neighborhood operators are chosen by 
+        adaptive pursuit on their improvement per second, default False 
+        for uniform choice, the counters of each operator are saved either way
+    31. Profile (bool) - whether the time and evaluations of the phases of 
+        each iteration are measured, printed with the progress and saved as 
+        a profile file of each run, default False
+    32. Plots (string) - how the figures of each run are drawn, 'show' draws 
+        and shows them in the main process and waits for them to be closed, 
+        'background' saves them by a worker process with no window, so that
+        the solver process never imports matplotlib, and 'none' skips them 
+        on a headless server, the results files are saved either way and 
+        can be plotted afterwards by results.py, default 'show'
+    33. Wait (float) - seconds a colony of islands waits for the others at a
+        migration before the run fails, so that a colony which crashed does
+        not leave the others waiting forever, default 600
 Outputs:
     1.  results files of objective value and solution of each run in the
         experiment
@@ -53,167 +116,575 @@ instances = 5 # instance number, for classical set 1-14, and for large scale set
 algorithms = [1, 2, 3] # a combination of algorithm, 1 original 2 semi-enhanced and 3 enhanced, format: [1, 2, 3]
 operators = [1, 5, 6] # a combination of neighborhood operators, any from 7 neighborhood operators, format: [1, 2, 3]
 
-'verify the inputs is valid'
-verifyPara(sets, instances, algorithms, operators)
-
-'Load contents of the studied instance and its best known solution'
-BestKnown, Dimension, Capacity, Duration, ServiceTime, Vehicles, Coordinates, Distance, Demand, File = dealData(sets, instances)
-Solroutes = loadSolution(sets, instances)
-# BestKnown (int) - the objective value of best known solution
-# Dimension (int) - the total number of customers and depot
-# Capacity (int) - the capacity constraint
-# Duration (int) - the duration constraint
-# ServiceTime (int) - the service time for each customer
-# Vehicles (int) - the total number of vehicles
-# Coordinates (list) - all the coordinates of customers, [[x1, y1], [x2, y2], ..., [xi, yi]]
-# Distance (list) - distances between each pair of customers and depot,
-#                  [[d1, d2, ..., di], [d1, d2, ..., di], ..., [d1, d2, ..., di]]
-# Demand (list) - demand of each customer, [1, 2, ..., i]
-# File (string) - name of instance file
-# Solroutes (list) - the vehicle trace of best known solution, [[0, 1, 0], [0, 2, 0], ..., [0, i, 0]]
-
 Size = 25 # the number of food sources
 Runs = 20 # experiment runs
-Iterations = 2000*(Dimension-1) # converge iterations
 
-Limit = 50*(Dimension-1) # the consecutive limit iterations before a food source is abandoned
 initalpha = 0.1 # coefficient of cost function, initial alpha
 initbeta = 0.1 # coefficient of cost function, initial beta
 delta = 0.001 # coefficient of cost function, constant delta
+dtype = np.float64 # data type of distance matrix, np.float32 halves its memory
+
+Workers = 1 # number of processes running the runs in parallel, eg. os.cpu_count()
+Seed = None # seed of the experiment, each run has its own stream of random numbers
+Islands = 1 # number of colonies in each run, each colony evolves in its own process
+Migration = 100 # iterations between two exchanges of the best food sources of colonies
+Step = 1 # record the best objective value and fitness every Step iterations
+Chunk = 1000 # records of the convergence log appended to disk at once, 0 for no log
+Checkpoint = 10000 # iterations between two checkpoints of each run, 0 for no checkpoint
+
+TimeLimit = 0 # seconds of each run, 0 for no limit
+Clock = 'wall' # clock of TimeLimit, 'wall' for wall-clock time and 'cpu' for CPU time
+Gap = None # stop when the best objective value is within Gap above the best known one, eg. 0.01
+Stall = 0 # stop after Stall iterations without improving the best objective value, 0 for never
+Evaluations = 0 # stop after Evaluations solutions have been evaluated, 0 for no limit
+Granular = False # the operators pick their second customer from the candidate lists, False for uniform picks
+Neighbors = 10 # nearest customers in the candidate list of each customer
+LocalSearch = 0 # iterations between two local searches of the best food sources, 0 for none
+LocalBest = 1 # number of the best food sources improved by each local search
+LocalScouts = False # improve the solutions replaced by renewal4 or renewal5 by the local search
+Seeding = 'random' # construction of initial solutions, 'random', 'sweep' or 'savings'
+Adaptive = False # choose the operators adaptively by their improvement per second, False for uniform choice
+Profile = False # time the phases of each iteration, print them with the progress and save them with the results
+Wait = 600 # seconds a colony waits for the others at a migration before the run fails
+Plots = 'show' # figures of each run, 'show' in this process, 'background' saved by a worker process, 'none' skipped
+
+# the inputs read by the runs, sent to the processes of workers and colonies, which import main again with 
+# the defaults when started by spawn, the start method on Windows and macOS
+inputs = ['operators', 'Size', 'initalpha', 'initbeta', 'Islands', 'Migration', 'Step', 'Checkpoint', 'TimeLimit', 
+          'Clock', 'Gap', 'Stall', 'Evaluations', 'LocalSearch', 'LocalBest', 'LocalScouts', 'Adaptive', 'Profile', 'Wait']
+
+def settings():
+    return {name: globals()[name] for name in inputs}
+
+'''******************************RUN*******************************************
+Aims:
+    apply one run of the selected ABC algorithm, in the main process or in a
+    worker process of the pool
+Inputs:
+    1.  inst (Instance) - the studied instance and the parameters of experiment
+    2.  algorithm (int) - 1 original 2 semi-enhanced and 3 enhanced
+    3.  itt (int) - the number of current run
+    4.  Iterations (int) - the total number of iterations in each run
+    5.  seed (int) - seed of the random numbers of this run
+    6.  migrate (tuple) - the connections to the previous and next colony when
+        the run is one of the islands, see functions.migrate
+    7.  log (Log) - optional, the log streaming the records of the run to disk
+    8.  checkpoint (string) - optional, the checkpoint file of the run, the 
+        run continues from it when it exists
+    9.  params (dict) - optional, the inputs of the experiment from settings,
+        taken over by a run in another process
+Returns:
+    1.  history (History) - the convergence history of the run, with the best
+        objective value, the best fitness and their solutions
+    2.  runtime (float) - CPU time of the run in seconds
+****************************************************************************'''
+def run(inst, algorithm, itt, Iterations, seed, migrate=None, log=None, checkpoint=None, params=None):
+    if params:
+        globals().update(params) # the inputs of the process which started the run
+    if (LocalSearch or LocalScouts) and inst.Candidates is None:
+        raise ValueError('the local search moves each customer next to its candidate list, Neighbors must be positive')
+    start = time.process_time()
+    print('Run', itt+1)
+    f.rng.seed(seed) # each run has its own stream of random numbers
 
-def main():
+    alpha = initalpha # update the initial value of alpha at each run
+    beta = initbeta # update the initial value of beta at each run
+
+    solutions = [] # set of solutions
+    solutionfit = [] # fitness of solutions
+    newsolutions = [] # new solutions generated by neighborhood operator
+    nsolutionfit = [] # fitness of new solutions
+    
+    capvio = [] # the violation of capacity constraint of current solutions
+    durvio = [] # the violation of duration constraint of current solutions
+    ncapvio = [] # the violation of capacity constraint of new solutions
+    ndurvio = [] # the violation of duration constraint of new solutions
+    
+    lcount = list(np.arange(inst.Size)*0) # count when neighbor solution failed to replace the current solution 
+
+    if checkpoint and os.path.exists(checkpoint):
+        'continue the interrupted run from its checkpoint'
+        solutions, solutionfit, capvio, durvio, lcount, alpha, beta, evals, history, begin, runtime = loadState(inst, Iterations, log, checkpoint)
+        start = start - runtime
+    else:
+        'a run starting from scratch drops the log of an attempt interrupted before its first checkpoint'
+        if log and os.path.exists(log.file):
+            os.remove(log.file)
+        
+        'Generate a set of initial solutions and calculate its objective value'
+        solutions = f.initial(inst, inst.Size) # generate a set of initial solutions
+        evals = f.refresh(inst, solutions, [None]*inst.Size) # evaluations of current solutions for the cost delta of moves
+        solutionfit, capvio, durvio = f.fun(inst, solutions, alpha, beta, evals) # calculate its fitness
+        history = f.History(Iterations, min(solutionfit), Step, log) # store the minimum objective value and fitness of each iteration
+        history.evaluations = inst.Size
+        history.operators = f.Selector(operators, Adaptive) # chooses the operators and counts their moves
+        history.profile = f.Profiler(Profile) # the time and evaluations of the phases
+        begin = 0 # the first iteration of the run
+    if history.reason: # the run has stopped before it was interrupted
+        begin = Iterations
+    wallstart = time.perf_counter() - history.wall # wall-clock time when the run started
+    selector = history.operators
+    profile = history.profile
+    profile.start()
+
+    '''----------------------------------------------------------------
+    Start each iteration
+    ----------------------------------------------------------------'''         
+    for it in range(begin, Iterations):
+
+        '''------------------------------------------------------------
+        Exploitation process
+        ------------------------------------------------------------'''
+        'apply neighborhood operator of current solutions and calculate its fitness by the cost delta of the move'
+        moves, nsolutionfit, ncapvio, ndurvio = f.neighbors(inst, evals, selector, alpha, beta)
+        
+        'build only the neighbor solutions which will replace the current solutions, with their evaluations'
+        newsolutions = solutions[:]
+        newevals = [None]*inst.Size
+        for j in range(inst.Size):
+            if nsolutionfit[j] < solutionfit[j]:
+                newevals[j] = f.build(inst, evals[j], moves[j])
+                newsolutions[j] = newevals[j]['x']
+
+        'replace with neighbor solutions or keep the current solutions based on their fitness'
+        solutions, solutionfit, lcount, capvio, durvio = f.renewal1(inst, solutionfit, nsolutionfit, solutions, newsolutions, 
+                                                                    lcount, capvio, durvio, ncapvio, ndurvio)
+        evals = f.refresh(inst, solutions, evals, newevals)
+        profile.lap('employed', inst.Size)
+
+        '''------------------------------------------------------------
+        Exploration process
+        ------------------------------------------------------------'''
+        'select a current solution using the fitness-based roulette wheel selection method'
+        newsolutions, sourceID = f.choose(inst, solutionfit, solutions)
+        
+        'apply neighborhood operator of current solutions and calculate its fitness by the cost delta of the move'
+        sourceevals = [evals[k] for k in sourceID] # evaluations of the selected current solutions
+        moves, nsolutionfit, ncapvio, ndurvio = f.neighbors(inst, sourceevals, selector, alpha, beta)
+        newevals = [None]*inst.Size
+
+        'the best neighbor solution of each selected current solution'
+        sources, minGis, locGis = f.generateGi(nsolutionfit, sourceID)
+        for j, minGi, locGi in zip(sources, minGis, locGis):
+            if minGi < solutionfit[j]: # build the best neighbor solution only when it will replace a current solution
+                newevals[locGi] = f.build(inst, sourceevals[locGi], moves[locGi])
+                newsolutions[locGi] = newevals[locGi]['x']
+            
+            'replace with neighbor solutions or keep the current solutions based on their fitness'
+            if algorithm == 1 or algorithm == 2: # for original ABC algorithm and semi-enhanced ABC algorithm
+                solutions, solutionfit, lcount, capvio, durvio = f.renewal2(inst, j, minGi, locGi, solutionfit, solutions, nsolutionfit, 
+                                                                             newsolutions, lcount, capvio, durvio, ncapvio, ndurvio)
+            elif algorithm == 3: # for enhanced ABC algorithm
+                solutions, solutionfit, lcount, capvio, durvio = f.renewal3(inst, j, minGi, locGi, solutionfit, solutions, nsolutionfit, 
+                                                                            newsolutions, lcount, capvio, durvio, ncapvio, ndurvio)
+        evals = f.refresh(inst, solutions, evals, newevals)
+        selector.adapt() # shift the probabilities toward the operators improving more per second
+        profile.lap('onlooker', inst.Size)
+
+        '''------------------------------------------------------------
+        Replace the solutions when reaching limit and update the coefficients
+        ------------------------------------------------------------'''              
+        'replace those solutions without improvement for consecutive limit iterations'
+        scouts = [j for j in range(inst.Size) if lcount[j] > inst.Limit] # the solutions replaced
+        abandoned = len(scouts)
+        if algorithm == 1: # for Original ABC algorithm
+            solutions, solutionfit, capvio, durvio, lcount = f.renewal4(inst, lcount, solutions, solutionfit, capvio, 
+                                                                        durvio, alpha, beta) 
+        elif algorithm == 2 or algorithm == 3: # for semi-enhanced ABC algorithm and enhanced ABC algorithm               
+            solutions, solutionfit, capvio, durvio, lcount = f.renewal5(inst, lcount, solutions, solutionfit, capvio, 
+                                                                        durvio, alpha, beta, selector) 
+        tried = 0
+        if LocalScouts and scouts: # improve the replaced solutions to a local optimum
+            solutions, solutionfit, lcount, capvio, durvio, tried = f.improve(inst, scouts, solutions, solutionfit, lcount, 
+                                                                               capvio, durvio, alpha, beta)
+            history.evaluations += tried
+        evals = f.refresh(inst, solutions, evals)
+        profile.lap('scout', abandoned + tried)
+        
+        'exchange the best food sources with the other colonies'
+        if migrate and (it+1) % Migration == 0:
+            solutions, solutionfit, lcount, capvio, durvio = f.migrate(inst, migrate, solutions, solutionfit, lcount, capvio, 
+                                                                       durvio, alpha, beta)
+            evals = f.refresh(inst, solutions, evals)
+            profile.lap('migration', 1)
+        
+        'improve the best food sources to a local optimum every LocalSearch iterations'
+        if LocalSearch and (it+1) % LocalSearch == 0:
+            best = np.argsort(solutionfit, kind='stable')[:LocalBest].tolist()
+            solutions, solutionfit, lcount, capvio, durvio, tried = f.improve(inst, best, solutions, solutionfit, lcount, 
+                                                                               capvio, durvio, alpha, beta)
+            history.evaluations += tried
+            evals = f.refresh(inst, solutions, evals)
+            profile.lap('local', tried)
+        
+        'update alpha and beta, and find out the best solution of current iteration'
+        feasible = history.feasible
+        solutionfit, alpha, beta, history = f.update(inst, solutions, solutionfit, alpha, beta, history, capvio, durvio, evals)
+        if history.feasible < feasible: # time to the best objective value
+            history.itbest = it + 1
+            history.tobest = time.perf_counter() - wallstart
+        history.evaluations += 2*inst.Size + abandoned # neighbor solutions of employed bees and onlookers, and replaced ones
+        history.wall = time.perf_counter() - wallstart
+        profile.lap('update')
+        
+        'stop the run early by the stopping rules, the colonies of islands only stop together after migration'
+        reason = stopRule(inst, history, it+1, time.process_time() - start)
+        if migrate:
+            reason = agree(migrate, reason, history.evaluations) if (it+1) % Migration == 0 else ''
+        if reason:
+            history.reason = reason
+
+        'print current iteration results'
+        if it < Iterations - 1:                
+            if it % (Iterations/10) == 0:
+                print('the best solution of %s/%s iteration：%s' % (it+1, Iterations, history.infeasible))
+                print('the best feasible solution of %s/%s iteration：%s' % (it+1, Iterations, history.feasible))
+                if Profile:
+                    print(profile.report())
+        elif it == Iterations - 1: # final iterations
+            print('the best solution of %s/%s iteration：%s' % (it+1, Iterations, history.infeasible))
+            print('the best feasible solution of %s/%s iteration：%s' % (it+1, Iterations, history.feasible))
+            if Profile:
+                print(profile.report())
+        if reason:
+            print('stop at %s/%s iteration by %s, the best feasible solution：%s' % (it+1, Iterations, reason, history.feasible))
+        
+        'save the search state every Checkpoint iterations and at the end of the run'
+        if checkpoint and ((it+1) % Checkpoint == 0 or it == Iterations - 1 or reason):
+            saveState(solutions, solutionfit, capvio, durvio, lcount, alpha, beta, evals, history, it+1, 
+                      time.process_time() - start, log, checkpoint)
+        profile.lap('other')
+        if reason:
+            break
+
+    if not history.reason:
+        history.reason = 'iterations'
+    history.finish()
+    
+    'improve the best food sources to a local optimum at the end of the run, the last record keeps the improvement'
+    if LocalSearch:
+        best = np.argsort(solutionfit, kind='stable')[:LocalBest].tolist()
+        solutions, solutionfit, lcount, capvio, durvio, tried = f.improve(inst, best, solutions, solutionfit, lcount, 
+                                                                           capvio, durvio, alpha, beta)
+        history.evaluations += tried
+        profile.lap('local', tried)
+        for j in best:
+            if solutionfit[j] < history.infeasible:
+                history.infeasible = solutionfit[j]
+                history.infeasisol = solutions[j]
+            if capvio[j] == 0 and durvio[j] == 0 and solutionfit[j] < history.feasible:
+                history.feasible = solutionfit[j]
+                history.feasisol = solutions[j]
+                history.itbest = history.it - 1
+                history.tobest = time.perf_counter() - wallstart
+        history.infeasibest[-1] = history.infeasible
+        history.feasibest[-1] = history.feasible
+        history.wall = time.perf_counter() - wallstart
+    if log:
+        log.flush() # the last records in buffer
+    return history, time.process_time() - start
+
+'''******************************STOPPING RULES********************************
+Aims:
+    1.  stopRule - check the stopping rules of a run after each iteration
+    2.  agree - let the colonies of islands stop together at a migration, a 
+        colony meeting a stopping rule sets the shared event, and all 
+        colonies read it between two barriers, each colony also writes its
+        evaluations to the shared counts, so that all colonies stop when the
+        sum of them reaches Evaluations
+Inputs:
+    1.  inst (Instance) - the studied instance and the parameters of experiment
+    2.  history (History) - the convergence history of the run
+    3.  it (int) - the number of iterations done
+    4.  runtime (float) - CPU time of the run till now in seconds
+    5.  migrate (tuple) - the connections, barrier, event, shared counts of 
+        evaluations of the colonies and the number of the colony
+    6.  reason (string) - the stopping rule met by the colony, '' for none
+    7.  evaluations (int) - the evaluations of the colony till now
+Returns:
+    reason (string) - the stopping rule met, '' for none, and 'colony' when
+    another colony met one
+****************************************************************************'''
+def stopRule(inst, history, it, runtime):
+    if TimeLimit and (history.wall if Clock == 'wall' else runtime) >= TimeLimit:
+        return 'time'
+    if Gap is not None and len(history.feasisol) > 0 and history.feasible <= inst.BestKnown*(1+Gap):
+        return 'gap'
+    if Stall and it - history.itbest >= Stall:
+        return 'stall'
+    if Evaluations and history.evaluations >= Evaluations:
+        return 'evaluations'
+    return ''
+
+def agree(migrate, reason, evaluations):
+    barrier, stop, counts, i = migrate[2:6]
+    counts[i] = evaluations # read by all colonies between the barriers
+    if reason:
+        stop.set()
+    barrier.wait()
+    if Evaluations and sum(counts) >= Evaluations and not reason: # the budget of all colonies
+        reason = 'evaluations'
+    if stop.is_set() and not reason:
+        reason = 'colony'
+    barrier.wait() # nobody sets the event again before all have read it
+    return reason
+
+'''******************************CHECKPOINT************************************
+Aims:
+    save the full search state of a run, and load it to continue the run bit
+    for bit as if it was not interrupted, the evaluations of solutions are 
+    saved as well since the cost deltas are added to them
+Inputs:
+    1.  the current solutions, their fitness, violations, limit counters and 
+        evaluations, the coefficients alpha and beta, and the history
+    2.  it (int) - the number of iterations done
+    3.  runtime (float) - CPU time of the run till now in seconds
+    4.  log (Log) - the log of the run, flushed with the checkpoint so that
+        it is cut back to the checkpoint when the run continues
+    5.  checkpoint (string) - the checkpoint file of the run
+Returns:
+    loadState - the search state in the order of its inputs of saveState
+****************************************************************************'''
+evalkeys = ['pos', 'ce', 'cl', 'zpos', 'zc', 'rdist', 'rload', 'rcnt', 'cc', 'cd', 'distance', 'capvio', 'durvio']
+
+def saveState(solutions, solutionfit, capvio, durvio, lcount, alpha, beta, evals, history, it, runtime, log, checkpoint):
+    'flush the log and remember its length'
+    logsize = 0
+    if log:
+        log.flush()
+        if os.path.exists(log.file):
+            logsize = os.path.getsize(log.file)
+    
+    'the stream of random numbers'
+    generator, left = f.rng.state()
+    
+    state = {'solutions': np.array(solutions), 'solutionfit': np.array(solutionfit), 'capvio': np.array(capvio), 
+             'durvio': np.array(durvio), 'lcount': np.array(lcount), 'coefficients': np.array([alpha, beta]), 
+             'it': it, 'runtime': runtime, 'logsize': logsize, 
+             'generator': generator, 'left': left, 
+             'historyit': history.it, 'historycount': history.count, 'history': np.array([history.infeasible, history.feasible]), 
+             'infeasisol': np.array(history.infeasisol, dtype=np.int32), 'feasisol': np.array(history.feasisol, dtype=np.int32), 
+             'iteration': history.iteration, 'infeasibest': history.infeasibest, 'feasibest': history.feasibest, 
+             'stop': np.array([history.evaluations, history.itbest, history.tobest, history.wall]), 'reason': np.array(history.reason), 
+             'operators': history.operators.state(), 'profile': history.profile.state()}
+    for key in evalkeys:
+        state['eval' + key] = np.array([ev[key] for ev in evals])
+    saveCheckpoint(checkpoint, state)
+
+def loadState(inst, Iterations, log, checkpoint):
+    state = loadCheckpoint(checkpoint)
+    solutions = list(state['solutions'])
+    solutionfit = state['solutionfit'].tolist()
+    capvio = state['capvio'].tolist()
+    durvio = state['durvio'].tolist()
+    lcount = list(state['lcount'])
+    alpha, beta = state['coefficients'].tolist()
+    
+    'the evaluations of current solutions'
+    evals = []
+    for j in range(len(solutions)):
+        ev = {'x': solutions[j], 'tour': solutions[j].tolist()}
+        for key in evalkeys:
+            ev[key] = state['eval' + key][j].tolist()
+        evals.append(ev)
+    
+    'the history, and the log cut back to the checkpoint'
+    history = f.History(Iterations, 0.0, Step, log)
+    history.it = int(state['historyit'])
+    history.count = int(state['historycount'])
+    history.infeasible, history.feasible = state['history'].tolist()
+    history.infeasisol = state['infeasisol'] if len(state['infeasisol']) else []
+    history.feasisol = state['feasisol'] if len(state['feasisol']) else []
+    history.iteration[:] = state['iteration']
+    history.infeasibest[:] = state['infeasibest']
+    history.feasibest[:] = state['feasibest']
+    history.evaluations, history.itbest, history.tobest, history.wall = state['stop'].tolist()
+    history.evaluations = int(history.evaluations)
+    history.itbest = int(history.itbest)
+    history.reason = str(state['reason'])
+    history.operators = f.Selector(operators, Adaptive)
+    history.operators.load(state['operators'])
+    history.profile = f.Profiler(Profile)
+    history.profile.load(state['profile'])
+    if log and os.path.exists(log.file):
+        with open(log.file, 'r+b') as file:
+            file.truncate(int(state['logsize']))
+    
+    'the stream of random numbers'
+    f.rng.load(state['generator'], state['left'])
+    
+    return solutions, solutionfit, capvio, durvio, lcount, alpha, beta, evals, history, int(state['it']), float(state['runtime'])
+
+'''******************************ISLANDS***************************************
+Aims:
+    apply one run with several colonies evolving in separate processes, which
+    form a ring and exchange their best food sources every Migration iterations
+Inputs:
+    the inputs of run, without checkpoint, each colony takes over the inputs
+    of the experiment from settings
+Returns:
+    the returns of run, the best objective value and fitness are the best of
+    all colonies in each record, the solutions are from the best colonies, 
+    and runtime is the CPU time of all colonies
+****************************************************************************'''
+def island(inst, algorithm, itt, Iterations, seed, migrate, log, params, result):
+    result.send(run(inst, algorithm, itt, Iterations, seed, migrate, log, params=params))
+
+def runIslands(inst, algorithm, itt, Iterations, seed, log=None, checkpoint=None, params=None):
+    if params:
+        globals().update(params) # the inputs of the process which started the run
+    # no checkpoint, the colonies could not be stopped at the same iteration, an interrupted run starts again
+    # and each colony starts its log again
+    seeds = np.random.SeedSequence(seed).generate_state(Islands) # each colony has its own stream of random numbers
+    
+    'start the colonies, each one receives from the previous colony and sends to the next one'
+    links = [multiprocessing.Pipe(duplex=False) for i in range(Islands)]
+    barrier = multiprocessing.Barrier(Islands, timeout=Wait) # the colonies wait for each other to stop together
+    stop = multiprocessing.Event() # set by a colony meeting a stopping rule
+    counts = multiprocessing.Array('q', Islands, lock=False) # evaluations of each colony, written by itself only
+    results = []
+    colonies = []
+    for i in range(Islands):
+        migrate = (links[i][0], links[(i+1) % Islands][1], barrier, stop, counts, i)
+        logi = Log(log.name, itt, algorithm, log.chunk, i+1) if log else None # each colony has its own log
+        results.append(multiprocessing.Pipe(duplex=False))
+        colonies.append(multiprocessing.Process(target=island, args=(inst, algorithm, itt, Iterations, int(seeds[i]), 
+                                                                     migrate, logi, settings(), results[i][1])))
+        colonies[i].start()
+        results[i][1].close() # only the colony holds its send end, so its crash is seen as the end of the pipe
+    
+    'collect the results, a colony ending without its result stops the run'
+    islands = [None]*Islands
+    waiting = {results[i][0]: i for i in range(Islands)}
+    while waiting:
+        for conn in multiprocessing.connection.wait(list(waiting)):
+            i = waiting.pop(conn)
+            try:
+                islands[i] = conn.recv()
+            except EOFError:
+                for colony in colonies:
+                    colony.terminate()
+                    colony.join()
+                raise RuntimeError('colony %d of run %d stopped without its result, exit code %s' 
+                                   % (i+1, itt+1, colonies[i].exitcode))
+    for colony in colonies:
+        colony.join()
+    
+    'gather the results of all colonies'
+    histories = [result[0] for result in islands]
+    feasibles = [colony for colony in histories if len(colony.feasisol) > 0] or histories # feasible stays the initial fitness till found
+    history = min(feasibles, key=lambda colony: colony.feasible) # the colony with the best objective value
+    best = min(histories, key=lambda colony: colony.infeasible) # the colony with the best fitness
+    history.infeasible = best.infeasible
+    history.infeasisol = best.infeasisol
+    history.feasibest[:] = np.min([colony.feasibest for colony in feasibles], axis=0)
+    history.infeasibest[:] = np.min([colony.infeasibest for colony in histories], axis=0)
+    history.evaluations = sum([colony.evaluations for colony in histories])
+    for colony in histories: # the counters of operators of all colonies
+        if colony is not history:
+            history.operators.add(colony.operators)
+            history.profile.add(colony.profile)
+    runtime = sum([result[1] for result in islands])
+    
+    return history, runtime
+
+# main can be called repeatedly to solve several instances back-to-back in one process, eg.
+# for i in range(1, 15): main(1, i)
+def main(sets=sets, instances=instances, resume=None):
     
     '''------------------------------------------------------------------------
     Initial the experiment
     ------------------------------------------------------------------------'''    
-    'create a folder for expriment results'
-    fname = 'Results\\Instance_' + str(sets) + '_' + str(instances) + '\\' + time.strftime("%Y%m%d %H%M%S", time.localtime())     
-    os.makedirs(fname) 
+    'verify the inputs is valid'
+    verifyPara(sets, instances, algorithms, operators)
+
+    'Load contents of the studied instance and its best known solution'
+    inst = Instance(sets, instances, Size, delta=delta, dtype=dtype, K=Neighbors, Granular=Granular, Seeding=Seeding) # see instances.Instance for its attributes
+    Iterations = 2000*(inst.Dimension-1) # converge iterations
+
+    'create a folder for expriment results, or continue the experiment in it'
+    if resume:
+        fname = resume
+    else:
+        fname = 'Results\\Instance_' + str(sets) + '_' + str(instances) + '\\' + time.strftime("%Y%m%d %H%M%S", time.localtime())     
+        os.makedirs(fname) 
     
     algoName = {1: "original", 2: "semi-enhanced", 3: "enhanced"} # algorithm name and number as index
     
     'print information about the instance and experiment'
     print('Instance: %s\nBest known solution：%s\nNumber of customers：%s\nCapacity：%s\nDuration：%s\nService time：%s\nNumber of vehicles：%s' 
-          % (File, BestKnown, Dimension-1, Capacity, Duration, ServiceTime, Vehicles))
+          % (inst.File, inst.BestKnown, inst.Dimension-1, inst.Capacity, inst.Duration, inst.ServiceTime, inst.Vehicles))
     print('solutionsize = %s\nlimit = %s\niterations = %s\nruns = %s\ninitial alpha = %s\ninitial beta = %s\ndelta = %s' 
-          % (Size, Limit, Iterations, Runs, initalpha, initbeta, delta))
+          % (inst.Size, inst.Limit, Iterations, Runs, initalpha, initbeta, inst.delta))
     
     '''------------------------------------------------------------------------
     Apply different algorithms in the experiment
     ------------------------------------------------------------------------'''
+    'the seed of each run, drawn from the seed of the experiment'
+    seeds = np.random.SeedSequence(Seed).generate_state(len(algorithms)*Runs).reshape(len(algorithms), Runs)
+    
+    'submit all runs of all algorithms to the pool of worker processes'
+    execute = runIslands if Islands > 1 else run # a run with several colonies or only one
+    pool = None
+    jobs = {} # runs in the pool, indexed by algorithm and run
+    plotter = ProcessPoolExecutor(max_workers=1) if Plots == 'background' else None # draws the figures off the solver process
+    plots = [] # figures submitted to the plotter
+    if Workers > 1:
+        pool = ProcessPoolExecutor(max_workers=Workers)
+        for ii in range(len(algorithms)):
+            for itt in range(Runs):
+                log = Log(fname, itt, algorithms[ii], Chunk) if Chunk else None
+                checkpoint = checkpointFile(fname, itt, algorithms[ii]) if Checkpoint else None
+                jobs[ii, itt] = pool.submit(execute, inst, algorithms[ii], itt, Iterations, int(seeds[ii, itt]), log=log, checkpoint=checkpoint, 
+                                            params=settings())
+    
     for ii in range(len(algorithms)):
         timers = [] # record the start time of every run
+        stops = [] # record how every run stopped
+        runtime = 0 # CPU time of all the runs before
         algorithm = algorithms[ii]
         algoname = algoName.get(algorithm, None)
         print('****************************************\nalgorithm:', algoname)
         
         '''--------------------------------------------------------------------
-        Start each run
+        Start each run, or collect it from the pool in order
         --------------------------------------------------------------------'''        
         for itt in range(Runs):            
-            timers.append(time.process_time())
-            print('Run', itt+1)
-            alpha = 0.1 # update the initial value of alpha at each run
-            beta = 0.1 # update the initial value of beta at each run
-           
-            feasibest = [] # the best objective value during each iteration
-            feasisol = [] # feasible solution with the best objective value during all iterations
-            infeasibest = [] # the best fitness of all solutions
-            infeasisol = [] # solution with the best fitness 
-            
-            solutions = [] # set of solutions
-            solutionfit = [] # fitness of solutions
-            newsolutions = [] # new solutions generated by neighborhood operator
-            nsolutionfit = [] # fitness of new solutions
-            
-            capvio = [] # the violation of capacity constraint of current solutions
-            durvio = [] # the violation of duration constraint of current solutions
-            ncapvio = [] # the violation of capacity constraint of new solutions
-            ndurvio = [] # the violation of duration constraint of new solutions
-            
-            lcount = list(np.arange(Size)*0) # count when neighbor solution failed to replace the current solution 
-        
-            'Generate a set of initial solutions and calculate its objective value'
-            solutions = f.initial(Size) # generate a set of initial solutions
-            solutionfit, capvio, durvio = f.fun(solutions, alpha, beta) # calculate its fitness
-            feasibest.append(min(solutionfit)) # store the minimum objective value of current iteration
-            infeasibest.append(min(solutionfit)) # store the minimum fitness of current iteration
-
-            '''----------------------------------------------------------------
-            Start each iteration
-            ----------------------------------------------------------------'''         
-            for it in range(Iterations):
-
-                '''------------------------------------------------------------
-                Exploitation process
-                ------------------------------------------------------------'''
-                'apply neighborhood operator of current solutions and calculate its fitness'
-                newsolutions = solutions[:]
-                for j in range(Size):
-                    newsolutions[j] = f.change(solutions[j], operators) # neighborhood operators
-                nsolutionfit, ncapvio, ndurvio = f.fun(newsolutions, alpha, beta) # calculate fitness
-
-                'replace with neighbor solutions or keep the current solutions based on their fitness'
-                solutions, solutionfit, lcount, capvio, durvio = f.renewal1(solutionfit, nsolutionfit, solutions, newsolutions, 
-                                                                            lcount, capvio, durvio, ncapvio, ndurvio)
-
-                '''------------------------------------------------------------
-                Exploration process
-                ------------------------------------------------------------'''
-                'select a current solution using the fitness-based roulette wheel selection method'
-                newsolutions, sourceID = f.choose(solutionfit, solutions)
-                
-                'apply neighborhood operator of current solutions and calculate its fitness'
-                for j in range(Size):
-                    newsolutions[j] = f.change(newsolutions[j], operators)
-                nsolutionfit, ncapvio, ndurvio = f.fun(newsolutions, alpha, beta)
-
-                for j in range(Size):
-                    if j in sourceID:
-                        'generate neighbor solution set of respective current solutions'
-                        minGi, locGi = f.generateGi(j, nsolutionfit, sourceID)
-                        
-                        'replace with neighbor solutions or keep the current solutions based on their fitness'
-                        if algorithm == 1 or algorithm == 2: # for original ABC algorithm and semi-enhanced ABC algorithm
-                            solutions, solutionfit, lcount, capvio, durvio = f.renewal2(j, minGi, locGi, solutionfit, solutions, nsolutionfit, 
-                                                                                         newsolutions, lcount, capvio, durvio, ncapvio, ndurvio)
-                        elif algorithm == 3: # for enhanced ABC algorithm
-                            solutions, solutionfit, lcount, capvio, durvio = f.renewal3(j, minGi, locGi, solutionfit, solutions, nsolutionfit, 
-                                                                                        newsolutions, lcount, capvio, durvio, ncapvio, ndurvio)
-
-                '''------------------------------------------------------------
-                Replace the solutions when reaching limit and update the coefficients
-                ------------------------------------------------------------'''              
-                'replace those solutions without improvement for consecutive limit iterations'
-                if algorithm == 1: # for Original ABC algorithm
-                    solutions, solutionfit, capvio, durvio, lcount = f.renewal4(lcount, solutions, solutionfit, capvio, 
-                                                                                durvio, alpha, beta) 
-                elif algorithm == 2 or algorithm == 3: # for semi-enhanced ABC algorithm and enhanced ABC algorithm               
-                    solutions, solutionfit, capvio, durvio, lcount = f.renewal5(lcount, solutions, solutionfit, capvio, 
-                                                                                durvio, alpha, beta, operators) 
-                
-                'update alpha and beta, and find out the best solution of current iteration'
-                solutionfit, alpha, beta, infeasibest, infeasisol, feasibest, feasisol = f.update(solutions, solutionfit, alpha, beta, infeasibest, 
-                                                                                                  infeasisol, feasibest, feasisol, capvio, durvio)
-
-                'print current iteration results'
-                if it < Iterations - 1:                
-                    if it % (Iterations/10) == 0:
-                        print('the best solution of %s/%s iteration：%s' % (it+1, Iterations, infeasibest[len(infeasibest)-1]))
-                        print('the best feasible solution of %s/%s iteration：%s' % (it+1, Iterations, feasibest[len(feasibest)-1]))
-                elif it == Iterations - 1: # final iterations
-                    print('the best solution of %s/%s iteration：%s' % (it+1, Iterations, infeasibest[len(infeasibest)-1]))
-                    print('the best feasible solution of %s/%s iteration：%s' % (it+1, Iterations, feasibest[len(feasibest)-1]))
+            timers.append(runtime)
+            if pool:
+                history, runtimej = jobs[ii, itt].result()
+            else:
+                log = Log(fname, itt, algorithm, Chunk) if Chunk else None # stream the convergence to disk during the run
+                checkpoint = checkpointFile(fname, itt, algorithm) if Checkpoint else None # continue from it when resuming
+                history, runtimej = execute(inst, algorithm, itt, Iterations, int(seeds[ii, itt]), log=log, checkpoint=checkpoint)
+            runtime += runtimej
+            stops.append([itt+1, history.it - 1, history.reason, history.evaluations, history.itbest, history.tobest, history.wall])
 
             '''----------------------------------------------------------------
             Visualize the final results and save it
             ----------------------------------------------------------------'''
             'plot coverging process of objective value and trace of vehicles'
-            f.visualize(feasibest, infeasibest, feasisol, Iterations, fname, algorithm, itt, Solroutes)
+            if Plots == 'show':
+                f.visualize(inst, history, fname, algorithm, itt)
+            elif Plots == 'background':
+                plots.append(plotter.submit(f.visualize, inst, history, fname, algorithm, itt, False))
+            f.report(inst, history)
             'save results of objective values and solutions'            
-            saveResult(fname, itt, algorithm, infeasibest, infeasisol, feasibest, feasisol)        
+            saveResult(fname, itt, algorithm, history.infeasibest, history.infeasisol, history.feasibest, history.feasisol, history.iteration, 
+                       history.operators.table(), history.profile.table() if Profile else None)        
             'save the time records of each run'
-            Timer(timers, algorithm, fname, Iterations, Size)
+            Timer(timers, algorithm, fname, Iterations, inst.Size, stops)
+    
+    if pool:
+        pool.shutdown()
+    if plotter:
+        'wait for the figures still being drawn, and raise the errors of drawing'
+        for plot in plots:
+            plot.result()
+        plotter.shutdown()
    
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    if '--resume' in sys.argv: # python main.py --resume "Results\\Instance_2_5\\20200101 120000"
+        main(sets, instances, sys.argv[sys.argv.index('--resume') + 1])
+    else:
+        main(sets, instances)
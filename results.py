@@ -6,15 +6,23 @@ Environment: Python 3.7.3, IDE: Spyder, CPU: 3.00GHz
 
 import os
 import re
+import sys
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from instances import loadInstance, readLog, logcolumns, Store
+
 '''***********************Result visualization*********************************
 Aims:
     1.  read the files of result and calculate the comparison indicators
     2.  compare the solutions of three algorithms with the best known one
     3.  visualize the best and average objective values of three algorithms
+    4.  the results are queried from the results store of the experiment, 
+        only the arrays of the best run of each algorithm are read, a folder
+        of results saved before the store is consolidated into one once
+    5.  python results.py --summary summarizes all experiments in folder 
+        Results from the manifests of their stores, without reading any array
 Input:
     path (string) - where the results stored
 Outputs:
@@ -31,143 +39,77 @@ Please enter the path of the result
 path = 'Results\\Instance_1_6\\results\\' # path of results of instance 6
 #path = 'Results\\Instance_1_14\\results\\' # path of results of instance 14
 
-if __name__ == '__main__': 
+def consolidate(path):
+    'build the results store of a folder saved as one file for each run'
+    store = Store(path.rstrip('\\'))
+    for name in os.listdir(path):
+        if name.endswith('.npy') and name.startswith('feasible_solution'):
+            namesplit = name.split('-')
+            if len(namesplit) == 3:
+                fitness = np.load(path+'feasible_fitness-'+namesplit[1]+'-'+namesplit[2])
+                iteration = path+'feasible_iteration-'+namesplit[1]+'-'+namesplit[2] # when recorded every few iterations
+                store.add(int(re.sub("\D","",namesplit[1])), int(re.sub("\D","",namesplit[2])), fitness, 
+                          np.load(iteration) if os.path.exists(iteration) else None, np.load(path+name))
+        elif name.startswith('timers'):
+            namesplit = name.split('-')
+            store.timers(int(re.sub("\D","",namesplit[1])), int(re.sub("\D","",namesplit[2])), 
+                         int(re.sub("\D","",namesplit[3])), np.atleast_1d(np.loadtxt(path+name)))
+    store.save()
+    return store
+
+def summary(root='Results'):
+    'the minimum, maximum, average and deviation of the best objective values of each experiment and algorithm'
+    records = []
+    for folder, folders, names in os.walk(root):
+        if 'store.json' in names:
+            store = Store(folder)
+            for algorithm in sorted(set(e['algorithm'] for e in store.runs())):
+                minfitness = [e['minfitness'] for e in store.runs(algorithm) if e['minfitness'] is not None]
+                records.append({'experiment': folder, 'algorithm': algorithm, 'runs': len(store.runs(algorithm)), 
+                                'minimum': min(minfitness, default=np.nan), 'maximum': max(minfitness, default=np.nan), 
+                                'average': np.mean(minfitness) if minfitness else np.nan, 
+                                'deviation': np.std(minfitness) if minfitness else np.nan})
+    return pd.DataFrame(records)
+
+if __name__ == '__main__' and '--summary' in sys.argv[1:]:
+    print(summary().to_string(index=False))
+elif __name__ == '__main__': 
     solname = {1: "Origin ABC", 2: "Semi-enhanced ABC", 3: "Enhanced ABC"} # algorithm name
     setname = {'1': "vrpnc", '2': "Kelly"} # instance set name
 
     algoname = [] # save the algorithm name
     time = [] # save the average time of each run with different algorithm
 
-    'read the instance file for information and figures'
-    # pointers for the beginnings of each section of instance file
-    coordinate_begin = -1 # customers coordinate section
-    demand_begin = -1 # customers demand section
-    origin_begin = -1 # depot coordinate section
-
-    # for those instances without capacity and duration constraints, set its constraints as 9999
-    Duration = 9999
-    Capacity = 9999
-    # for those instances without considering service time, set its service time as 0
-    ServiceTime = 0 
-    
+    'read the instance and its best known solution, through the cache shared with main.py'
     pathsplit = path.split('\\')
     nm = pathsplit[1].split('_') # get the instance number
+    BestKnown, Dimension, Capacity, Duration, ServiceTime, Vehicles, Coordinates, Distance, Demand, File, solroutes = loadInstance(int(nm[1]), int(nm[2]))
+    Vehicles = len(solroutes) # the number of vehicles in best known solution
     
-    # find out the file name of studied instance 
-    if int(nm[1]) == 1:        
-        instances = 'CMT' + nm[2] + '.vrp'
-        solution = 'CMT' + nm[2] + '.sol'
-    elif int(nm[1]) == 2:
-        instances = 'Golden_' + nm[2] + '.vrp'
-        solution = 'Golden_' + nm[2] + '.sol'
-
-    with open('Instances\\'+ instances) as lines:
-        for line in lines:
-            # BestKnown - known best solution
-            if ('COMMENT' in line):
-                a = line.replace("\n", "")
-                b = a.split(': ')
-                BestKnown = float(b[1])
-            # Dimension - total number of vertices and depot
-            if ('DIMENSION' in line):
-                a = line.replace("\n", "")
-                b = a.split(': ')
-                Dimension = int(b[1])
-            # Capacity - the maximum number of customers(demands) that a vehicle can take
-            if ('CAPACITY' in line):
-                a = line.replace("\n", "")
-                b = a.split(': ')
-                Capacity = int(b[1])
-            # Duration - the maximum total number of travel distance and service time that a vehicle can travel
-            if ('DISTANCE' in line):
-                a = line.replace("\n", "")
-                b = a.split(': ')
-                Duration = int(float(b[1]))
-            # ServiceTime - service time at each vertex
-            if ('SERVICE_TIME' in line):
-                a = line.replace("\n", "")
-                b = a.split(': ')
-                ServiceTime = int(float(b[1]))
-            # Vehicles - the minimum number of vehicles needed to serve all the customers
-            if ('VEHICLES' in line):
-                a = line.replace("\n", "")
-                b = a.split(': ')
-                Vehicles = int(b[1])
-            # x,y of vertices
-            if ('NODE_COORD_SECTION' in line):
-                Coordinates = np.zeros((Dimension, 2))
-                coordinate_begin = 1
-                continue
-            if coordinate_begin > 0 and coordinate_begin < Dimension:
-                a = line.replace("\n", "")
-                b = a.split(' ')
-                Coordinates[coordinate_begin][0] = float(b[1])
-                Coordinates[coordinate_begin][1] = float(b[2])
-                coordinate_begin = coordinate_begin + 1
-            # x,y of depot
-            if ('DEPOT_SECTION' in line):
-                origin_begin = 1
-                demand_begin = -1
-                continue
-            if origin_begin == 1:
-                a = line.replace("\n", "")
-                b = a.split(' ')
-                Coordinates[0][0] = float(b[0])
-                Coordinates[0][1] = float(b[1])
-                origin_begin = origin_begin + 1
-            # Demand - the number of customers at each vertex
-            if ('DEMAND_SECTION' in line):
-                coordinate_begin = -1
-                demand_begin = 1
-                Demand = [0]
-                continue
-            if demand_begin > 0 and demand_begin < Dimension:
-                a = line.replace("\n", "")
-                b = a.split(' ')
-                Demand.append(float(b[1]))
-                demand_begin = demand_begin + 1
-    
-    'read the solution file for the best known solution'
-    linenumber = 0
-    Vehicles = 0
-    with open('Instances\\' + solution) as lines:
-        for line in lines:
-            linenumber += 1
-            if linenumber == 2:
-                a = line.replace("\n", "").replace("  ", " ")
-                Vehicles = int(a)
-                solroutes = [[0] for i in range(Vehicles)]
-            if linenumber > 4:
-                a = line.replace("\n", "").replace("  ", " ")
-                b = a.split(' ')
-                solroutes[linenumber - 5] = list(map(int, b[7:len(b)]))
-    
-    'read the result files of each algorithm and calculations'
-    result = {'algorithm': [], 'run': [], 'minfitness': [], 'allfitness': [], 'solution': []}
+    'query the results store of the experiment, built once for a folder saved without it'
+    store = Store(path.rstrip('\\'))
     names = os.listdir(path) # get the file names of results
-    algocount = sum(map(lambda x : 'timers' in x , names)) # identify the number of algorithms
-    runs = int(sum(map(lambda x : 'feasible_fitness' in x , names))/algocount)  # identify the runs in the experiments
+    if not store.runs():
+        store = consolidate(path)
+    
+    'print the progress of each run from its convergence log, also of runs still going'
+    for name in sorted(names):
+        if name.startswith('log'):
+            log = readLog(path+name)
+            if len(log):
+                print('%s: %s' % (name, ', '.join(['%s %g' % (column, value) for column, value in zip(logcolumns, log[-1])])))
+    algocount = len(store.manifest['timers']) # identify the number of algorithms
+    runs = int(len(store.runs())/algocount)  # identify the runs in the experiments
     minfitness = [[] for i in range(3)] # store the minimum objective value of each run
-    allfitness = [[] for i in range(3)] # store coverging process of the objective value of each run
     time = [[] for i in range(3)] # store the average CPU run time in minutes for each algorithm
-    for name in names: # read each file
-        if name.endswith('.npy') and name.startswith('feasible_solution'): # select result files
-            namesplit = name.split('-')
-            if len(namesplit) == 3:
-                result['algorithm'].append(int(re.sub("\D","",namesplit[1]))) # algorithm number, 1 origin, 2 semi-enhanced and 3 enhanced
-                result['run'].append(int(re.sub("\D","",namesplit[2]))) # run number, start from 1
-                result['solution'].append(np.load(path+name)) # solutions in straightforward representation scheme
-                result['allfitness'].append(np.load(path+'feasible_fitness-'+namesplit[1]+'-'+namesplit[2]))
-                result['minfitness'].append(min(np.load(path+'feasible_fitness-'+namesplit[1]+'-'+namesplit[2])))
-        elif name.startswith('timers'):
-            namesplit = name.split('-')
-            size = int(re.sub("\D","",namesplit[2])) # size of employed bee
-            iterations = int(re.sub("\D","",namesplit[3])) # iterations in each run
-            timers = np.loadtxt(path+name) # read the records of CPU run time
-            algon = int(re.sub("\D","",namesplit[1]))-1 # get the algorithm number
-            time[algon] = (timers[runs-1]-timers[0])/(runs-1)/60 # calculate the average CPU run time in minutes
+    for entry in store.manifest['timers']:
+        size = entry['size'] # size of employed bee
+        iterations = entry['iterations'] # iterations in each run
+        timers = entry['timers'] # the records of CPU run time
+        time[entry['algorithm']-1] = (timers[runs-1]-timers[0])/(runs-1)/60 # calculate the average CPU run time in minutes
     
-    df = pd.DataFrame(result) # turn the dictionary into dataframe for manipulation
+    'index of the runs from the manifest, their arrays are read when plotted'
+    df = pd.DataFrame([{'algorithm': e['algorithm'], 'run': e['run'], 'minfitness': e['minfitness'], 'entry': e} for e in store.runs()])
     df.sort_values(by=["algorithm","minfitness"], inplace=True, ascending=[True,True]) # sort the results by algorithm type and its best objective value
     algo = df['algorithm'].value_counts().index.sort_values() # list the algorithm number
     for i in range(len(algo)):
@@ -176,7 +118,6 @@ if __name__ == '__main__':
     for i in range(len(df)):
         # put the best objective value from each run in the list, each algorithm has its own list, for calculate the average objective value   
         minfitness[df['algorithm'].values[i]-1].append(df['minfitness'].values[i])
-        allfitness[df['algorithm'].values[i]-1].append(df['allfitness'].values[i])
 
     name = [] 
     for i in range(Vehicles):
@@ -221,7 +162,7 @@ if __name__ == '__main__':
               % (time[algo[i]-1]))
         
         plt.figure(i)
-        tra = df['solution'].values[i*runs]
+        tra = store.read('solution', df['entry'].values[i*runs]) # solution in straightforward representation scheme
         trace = [[0] for i in range(Vehicles)]
         t = 0
         for j in range(len(tra)): # generate trace of each vehicle from solution
@@ -247,7 +188,8 @@ if __name__ == '__main__':
     'plot the best objective value of all runs'   
     plt.figure(len(algo) + 1) # best fitness
     for i in range(len(algo)):
-        plt.plot(df['allfitness'].values[i*runs]) # find the minimum objective value
+        entry = df['entry'].values[i*runs] # the run with the minimum objective value
+        plt.plot(store.read('iteration', entry), store.read('fitness', entry))
     plt.legend(algoname,loc=1)
     plt.title('Convering processes of the best solution')
     plt.xlabel('Iterations', fontproperties='SimHei')
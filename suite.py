@@ -0,0 +1,138 @@
+"""
+Benchmark suite
+
+Environment: Python 3.7.3, IDE: Spyder, CPU: 3.00GHz
+"""
+
+import os
+import sys
+import json
+import time
+import numpy as np
+import pandas as pd
+import multiprocessing
+
+from instances import Instance
+import main as m
+
+try: # peak memory of a process, only on Unix
+    import resource
+except ImportError:
+    resource = None
+
+'''****************************Benchmark suite*********************************
+Aims:
+    1.  run the enhanced ABC algorithm on all 34 instances, the classical set
+        CMT1-14 and the large scale set Golden_1-20, with fixed seeds and the
+        same budget of iterations for each instance
+    2.  record the performance of each run, each run is in a new process so
+        that its peak memory is its own
+    3.  compare the records with a stored baseline and flag the regressions
+Inputs:
+    1.  instances (list) - (set, instance number) of the studied instances
+    2.  Seeds (list) - seeds of the runs of each instance
+    3.  Iterations (int) - the budget of iterations of each run
+    4.  algorithm (int) - 1 original 2 semi-enhanced and 3 enhanced
+    5.  Baseline (string) - optional, a JSON file of the suite saved before,
+        the records are compared with it, also the first argument of the
+        command line, eg. python suite.py "Results\\suite-20200101 120000.json"
+    6.  Tolerance (float) - the relative loss of speed (evaluations per second,
+        wall time) flagged as a regression, eg. 0.1 means 10% slower
+    7.  GapTolerance (float) - the increase of the gap to the best known
+        solution flagged as a regression, eg. 0.01 means 1% of BestKnown
+Outputs:
+    1.  suite - records (DataFrame) - for each instance and seed, the wall
+        time and CPU time in seconds, evaluations per second, peak resident
+        memory in MB, the best objective value and its gap to the best known
+        value in the COMMENT of the instance file, saved as JSON and CSV
+        files in folder Results, a run whose process failed is recorded as
+        failed without results
+    2.  compare - regressions (DataFrame) - the records worse than the
+        baseline, with the metric and both values, a run losing the feasible
+        solution of the baseline is a regression of gap
+****************************************************************************'''
+
+'''----------------------------------------------------------------------------
+Please set the inputs of the benchmark
+----------------------------------------------------------------------------'''
+instances = [(1, i) for i in range(1, 15)] + [(2, i) for i in range(1, 21)] # CMT1-14 and Golden_1-20
+Seeds = [1, 2, 3] # seeds of the runs of each instance
+Iterations = 2000 # iterations of each run
+algorithm = 3 # enhanced ABC algorithm
+Baseline = None # JSON file of a stored suite to compare with, None for no comparison
+Tolerance = 0.1 # relative loss of speed flagged as regression
+GapTolerance = 0.01 # increase of gap flagged as regression
+
+def bench(sets, number, seed, conn):
+    'one run in its own process, timed by the wall clock and CPU time'
+    inst = Instance(sets, number, m.Size, delta=m.delta, dtype=m.dtype, K=m.Neighbors, Granular=m.Granular,
+                    Seeding=m.Seeding)
+    start = time.perf_counter()
+    history, runtime = m.run(inst, algorithm, 0, Iterations, seed)
+    wall = time.perf_counter() - start
+
+    'peak resident memory, in kilobytes on Linux and in bytes on macOS'
+    rss = np.nan
+    if resource is not None:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024
+        if sys.platform == 'darwin':
+            rss = rss/1024
+    objective = history.feasible if len(history.feasisol) > 0 else np.nan
+    conn.send({'instance': inst.File, 'seed': seed, 'iterations': history.it - 1, 'wall': wall, 'cpu': runtime,
+               'evaluations': history.evaluations, 'evalspersec': history.evaluations/wall, 'peakrss': rss,
+               'objective': objective, 'bestknown': inst.BestKnown, 'gap': objective/inst.BestKnown - 1})
+    conn.close()
+
+def suite():
+    records = []
+    for sets, number in instances:
+        for seed in Seeds:
+            receive, send = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=bench, args=(sets, number, seed, send))
+            process.start()
+            send.close() # only the run holds the send end, so its crash is seen as the end of the pipe
+            try:
+                records.append(receive.recv())
+            except EOFError: # the run failed, recorded without results
+                records.append({'instance': {1: 'CMT', 2: 'Golden_'}[sets] + str(number) + '.vrp', 'seed': seed, 'failed': True})
+            process.join()
+            records[-1].setdefault('failed', False)
+    return pd.DataFrame(records)
+
+def compare(records, baseline):
+    'the same instance and seed of the suite and the baseline side by side'
+    both = records.merge(baseline, on=['instance', 'seed'], suffixes=('', '_baseline'))
+    regressions = []
+    for metric, worse in (('evalspersec', both['evalspersec'] < both['evalspersec_baseline']*(1 - Tolerance)),
+                          ('wall', both['wall'] > both['wall_baseline']*(1 + Tolerance)),
+                          ('gap', (both['gap'] > both['gap_baseline'] + GapTolerance) | 
+                                  (both['gap'].isna() & both['gap_baseline'].notna()))): # no feasible solution any more
+        for k in np.flatnonzero(worse.to_numpy()):
+            regressions.append({'instance': both['instance'].iloc[k], 'seed': both['seed'].iloc[k], 'metric': metric,
+                                'value': both[metric].iloc[k], 'baseline': both[metric + '_baseline'].iloc[k]})
+    return pd.DataFrame(regressions, columns=['instance', 'seed', 'metric', 'value', 'baseline'])
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        Baseline = sys.argv[1]
+    records = suite()
+
+    'print and save the results of the suite'
+    print(records.to_string(index=False))
+    os.makedirs('Results', exist_ok=True)
+    name = 'Results\\suite-' + time.strftime("%Y%m%d %H%M%S", time.localtime())
+    records.to_csv(name + '.csv', index=False)
+    with open(name + '.json', 'w') as file:
+        json.dump({'Iterations': Iterations, 'algorithm': algorithm, 'records': json.loads(records.to_json(orient='records'))}, 
+                  file, indent=1)
+
+    'flag the regressions against the baseline'
+    if Baseline:
+        with open(Baseline) as file:
+            baseline = pd.DataFrame(json.load(file)['records'])
+        regressions = compare(records, baseline)
+        if len(regressions) > 0:
+            print('regressions against %s:' % Baseline)
+            print(regressions.to_string(index=False))
+            sys.exit(1)
+        print('no regression against %s' % Baseline)